@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache whose entries expire after a TTL.
+
+    Not thread-safe; it is meant to be used from the event loop. Hit and miss
+    counts are kept so callers can report them.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float = 300.0,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= self.timer():
+            del self._data[key]
+            return _MISSING
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (self.timer() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            return default
+        del self._data[key]
+        return value
+
+    def clear(self) -> None:
+        self._data.clear()
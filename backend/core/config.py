@@ -1,4 +1,5 @@
 import os
+from typing import Dict, List
 
 from dotenv import find_dotenv, load_dotenv
 from pydantic_settings import BaseSettings
@@ -12,11 +13,113 @@ class Settings(BaseSettings):
     secret_key: str = os.environ.get("SECRET_KEY", "7ebad0331164e21ead3c90ca6265388141399e19a5811b9b3a2f5757ea729819")
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    principal_cache_size: int = 10_000
+    principal_cache_ttl: float = 60.0
+    password_hash_workers: int = 4
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
+    db_behind_pgbouncer: bool = True
 
     # ------------------ Redis ------------------
     redis_url: str = os.environ.get("REDIS_URL", "redis://localhost")
     use_redis: bool = True
 
+    # ------------------ Chatbot ------------------
+    workflow_pool_size: int = 16
+    server_timing_enabled: bool = True
+    chat_batch_max_size: int = 1000
+    chat_batch_concurrency: int = 8
+
+    # ------------------ Jobs ------------------
+    # Workers run inside each API process; 0 leaves jobs to `backend.worker`
+    job_workers: int = 4
+    job_poll_interval: float = 1.0
+    job_long_poll_max: float = 30.0
+    # Running jobs not finished after this long are assumed lost and requeued
+    job_stale_after: float = 300.0
+    job_max_attempts: int = 3
+
+    # ------------------ Rate limiting ------------------
+    # Buckets refill at `rate` tokens per second up to `burst`; each chat
+    # request costs its agent type's weight
+    rate_limit_enabled: bool = True
+    rate_limit_user_rate: float = 1.0
+    rate_limit_user_burst: float = 20.0
+    rate_limit_global_rate: float = 50.0
+    rate_limit_global_burst: float = 200.0
+    rate_limit_costs: Dict[str, float] = {
+        "simple": 1.0,
+        "prompt_optim": 2.0,
+        "multi_step": 6.0,
+    }
+
+    # ------------------ LLM clients ------------------
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry: float = 30.0
+    llm_timeout: float = 60.0
+    llm_warmup_models: List[str] = ["llama-3.1-70b-versatile"]
+    # Retries of transient failures, within the workflow timeout
+    llm_retry_attempts: int = 3
+    llm_retry_backoff_base: float = 0.25
+    llm_retry_backoff_max: float = 4.0
+    # Consecutive failures that open a model's circuit, and how long it stays open
+    llm_circuit_failure_threshold: int = 5
+    llm_circuit_reset_timeout: float = 30.0
+    # Adaptive (AIMD) concurrency limit per provider and model
+    llm_concurrency_initial: int = 16
+    llm_concurrency_min: int = 1
+    llm_concurrency_max: int = 256
+    llm_concurrency_backoff: float = 0.5
+    llm_concurrency_latency_tolerance: float = 3.0
+    # Allow the local `fake/<profile>` models (benchmarks and CI)
+    llm_fake_enabled: bool = False
+    # Secondary model per primary model for hedged calls and failover
+    llm_hedge_models: Dict[str, str] = {}
+    # Hedge once the primary is slower than this percentile of its latency
+    llm_hedge_percentile: float = 95.0
+    llm_hedge_initial_delay: float = 2.0
+    llm_hedge_min_delay: float = 0.25
+    llm_hedge_window: int = 256
+    llm_hedge_min_samples: int = 20
+
+    # ------------------ Response cache ------------------
+    response_cache_local_size: int = 1024
+    response_cache_local_ttl: float = 300.0
+    response_cache_default_ttl: int = 3600
+    response_cache_ttls: Dict[str, int] = {
+        "simple": 3600,
+        "prompt_optim": 3600,
+        "multi_step": 86400,
+    }
+    # Memo of multi-step decompositions and subtask results, per process
+    subtask_cache_enabled: bool = True
+    subtask_cache_size: int = 4096
+    subtask_cache_ttl: float = 3600.0
+
+    # ------------------ Conversations ------------------
+    # Messages always kept verbatim; older ones are folded into a rolling
+    # summary in batches
+    conversation_history_window: int = 8
+    # Hot history cache, per process: set the TTL to 0 when running several
+    # workers without sticky routing, or they serve each other stale windows
+    conversation_cache_size: int = 1024
+    conversation_cache_ttl: float = 900.0
+    conversation_summary_enabled: bool = True
+    conversation_summary_model: str = "llama-3.1-70b-versatile"
+    # Messages past the window are folded once this many have accumulated
+    # (one summary call each); until then they stay in the prompt verbatim
+    conversation_summary_batch_size: int = 10
+
+    # ------------------ Persistence ------------------
+    persistence_queue_size: int = 10_000
+    persistence_batch_size: int = 200
+    persistence_flush_interval: float = 0.05
+
     class ConfigDict:
         env_file = ".env"
 
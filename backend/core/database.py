@@ -1,25 +1,82 @@
 # core/database.py
+import time
+from uuid import uuid4
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from ..core.config import settings
+from .metrics import (
+    db_pool_checked_out,
+    db_pool_checkouts,
+    db_pool_size,
+    db_pool_wait_seconds,
+    db_session_seconds,
+)
 
 Base = declarative_base()
 
-engine = create_async_engine(
-    settings.database_url,
-    future=True,
-    connect_args={'statement_cache_size': 0},
-)
 
-async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waited for a connection.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait_seconds.observe(time.perf_counter() - start)
+            db_pool_checkouts.inc()
+
 
+def _connect_args() -> dict:
+    if not settings.database_url.startswith("postgresql+asyncpg"):
+        return {}
+    if settings.db_behind_pgbouncer:
+        # Transaction-pooling proxies cannot keep per-connection prepared
+        # statements, so disable both caches and use unique statement names.
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+    }
 
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+
+def _engine_kwargs() -> dict:
+    if settings.database_url.startswith("sqlite"):
+        # SQLite picks its own pool; the sizing options do not apply
+        return {}
+    return {
+        "poolclass": InstrumentedPool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": _connect_args(),
+    }
+
+
+engine = create_async_engine(settings.database_url, future=True, **_engine_kwargs())
+
+if isinstance(engine.pool, InstrumentedPool):
+    db_pool_size.set_function(engine.pool.size)
+    db_pool_checked_out.set_function(engine.pool.checkedout)
+
+async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def get_session():
-    async with async_session_maker() as session:
-        yield session
+    start = time.perf_counter()
+    try:
+        async with async_session_maker() as session:
+            yield session
+    finally:
+        db_session_seconds.observe(time.perf_counter() - start)
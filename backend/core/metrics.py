@@ -0,0 +1,192 @@
+from prometheus_client import Counter, Enum, Gauge, Histogram
+
+# ------------------ Chat requests ------------------
+chat_requests = Counter(
+    "chat_requests_total",
+    "Chat requests by endpoint, agent type and result (ok, fallback or error).",
+    ["endpoint", "agent_type", "result"],
+)
+chat_request_seconds = Histogram(
+    "chat_request_seconds",
+    "End-to-end chat request latency.",
+    ["endpoint", "agent_type"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 60.0),
+)
+conversation_save_seconds = Histogram(
+    "conversation_save_seconds",
+    "Time spent saving (or enqueueing) a chat turn, by mode.",
+    ["mode"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+# ------------------ Workflows ------------------
+workflow_step_seconds = Histogram(
+    "workflow_step_seconds",
+    "Latency of each workflow step.",
+    ["agent_type", "model", "step"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0),
+)
+workflow_step_errors = Counter(
+    "workflow_step_errors_total",
+    "Workflow steps that raised.",
+    ["agent_type", "model", "step"],
+)
+llm_call_seconds = Histogram(
+    "llm_call_seconds",
+    "Latency of provider calls, by call kind (complete, structured, stream).",
+    ["agent_type", "model", "call"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0),
+)
+llm_call_errors = Counter(
+    "llm_call_errors_total",
+    "Provider calls that raised, by call kind.",
+    ["agent_type", "model", "call"],
+)
+llm_time_to_first_token_seconds = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from starting a streamed completion to its first token.",
+    ["agent_type", "model"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+llm_tokens_per_second = Histogram(
+    "llm_tokens_per_second",
+    "Streamed completion throughput after the first token.",
+    ["agent_type", "model"],
+    buckets=(5, 10, 25, 50, 100, 200, 400, 800),
+)
+llm_queue_wait_seconds = Histogram(
+    "llm_queue_wait_seconds",
+    "Time provider calls waited for a concurrency slot.",
+    ["provider", "model"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+llm_concurrency_limit = Gauge(
+    "llm_concurrency_limit",
+    "Current adaptive concurrency limit for provider calls.",
+    ["provider", "model"],
+)
+llm_in_flight = Gauge(
+    "llm_in_flight",
+    "Provider calls currently holding a concurrency slot.",
+    ["provider", "model"],
+)
+llm_retries = Counter(
+    "llm_retries_total",
+    "Provider calls retried, by the class of the failure.",
+    ["provider", "model", "reason"],
+)
+llm_circuit_state = Enum(
+    "llm_circuit_state",
+    "State of the circuit breaker for each provider and model.",
+    ["provider", "model"],
+    states=["closed", "half_open", "open"],
+)
+llm_circuit_rejections = Counter(
+    "llm_circuit_rejections_total",
+    "Provider calls failed fast because the circuit breaker was open.",
+    ["provider", "model"],
+)
+llm_hedge_requests = Counter(
+    "llm_hedge_requests_total",
+    "Duplicate calls sent to the secondary model, by reason (slow, error).",
+    ["agent_type", "model", "call", "reason"],
+)
+llm_hedge_wins = Counter(
+    "llm_hedge_wins_total",
+    "Hedged calls by which model answered first (primary, secondary).",
+    ["agent_type", "model", "call", "winner"],
+)
+
+# ------------------ Jobs ------------------
+chat_jobs = Counter(
+    "chat_jobs_total",
+    "Background chat jobs by agent type and outcome (ok, fallback, error, requeued).",
+    ["agent_type", "result"],
+)
+chat_job_queue_seconds = Histogram(
+    "chat_job_queue_seconds",
+    "Time from submitting a job to a worker starting it.",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+chat_jobs_running = Gauge(
+    "chat_jobs_running",
+    "Jobs currently being executed by this process's workers.",
+)
+
+# ------------------ Response cache ------------------
+response_cache_requests = Counter(
+    "chat_response_cache_requests_total",
+    "Chat response cache lookups by tier and result.",
+    ["tier", "result"],
+)
+
+subtask_cache_requests = Counter(
+    "chat_subtask_cache_requests_total",
+    "Multi-step decomposition and subtask cache lookups by result.",
+    ["kind", "result"],
+)
+
+# ------------------ Request coalescing ------------------
+singleflight_requests = Counter(
+    "singleflight_requests_total",
+    "Requests that started (leader) or joined (follower) an in-flight execution.",
+    ["name", "role"],
+)
+
+# ------------------ Conversation persistence ------------------
+persistence_queue_depth = Gauge(
+    "conversation_persistence_queue_depth",
+    "Chat turns waiting in the write-behind queue.",
+)
+persistence_flush_seconds = Histogram(
+    "conversation_persistence_flush_seconds",
+    "Time spent writing one batch of chat turns.",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+persistence_turns = Counter(
+    "conversation_persistence_turns_total",
+    "Chat turns written by the write-behind queue, by result.",
+    ["result"],
+)
+
+# ------------------ Database pool ------------------
+db_pool_size = Gauge(
+    "db_pool_size",
+    "Configured number of persistent connections in the database pool.",
+)
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "Database connections currently checked out of the pool.",
+)
+db_pool_checkouts = Counter(
+    "db_pool_checkouts_total",
+    "Connections handed out by the database pool.",
+)
+db_session_seconds = Histogram(
+    "db_session_seconds",
+    "Time request-scoped database sessions are held open.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+db_pool_wait_seconds = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a connection from the database pool.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0),
+)
+
+# ------------------ Rate limiting ------------------
+rate_limit_requests = Counter(
+    "chat_rate_limit_requests_total",
+    "Chat requests by admission result (allowed, limited_user, limited_global).",
+    ["agent_type", "result"],
+)
+
+# ------------------ Authentication ------------------
+principal_cache_requests = Counter(
+    "auth_principal_cache_requests_total",
+    "Authenticated user lookups served from the principal cache, by result.",
+    ["result"],
+)
+principal_cache_hit_ratio = Gauge(
+    "auth_principal_cache_hit_ratio",
+    "Fraction of authenticated user lookups served from the principal cache.",
+)
@@ -0,0 +1,186 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from .. import logger
+from .cache import TTLCache
+from .config import settings
+from .metrics import rate_limit_requests
+
+# A bucket is (key, refill rate in tokens per second, burst capacity)
+Bucket = Tuple[str, float, float]
+
+# Checks every bucket and only takes `cost` tokens when all of them have
+# enough, so a request rejected by the global bucket does not drain the
+# user's. Returns {index of the blocking bucket or 0, seconds to wait}.
+_ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local levels = {}
+local blocked, wait = 0, 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    local need = math.min(cost, burst)
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < need and (need - tokens) / rate > wait then
+        blocked, wait = i, (need - tokens) / rate
+    end
+end
+if blocked == 0 then
+    for i, key in ipairs(KEYS) do
+        local rate = tonumber(ARGV[i * 2])
+        local burst = tonumber(ARGV[i * 2 + 1])
+        redis.call('HSET', key, 'tokens', levels[i] - math.min(cost, burst), 'ts', now)
+        redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000))
+    end
+end
+return {blocked, tostring(wait)}
+"""
+
+
+class LocalBuckets:
+    """
+    In-process token buckets. Idle buckets are evicted once they would have
+    refilled anyway, so memory stays bounded by the number of active users.
+    """
+
+    def __init__(self, max_size: int = 100_000, timer=time.monotonic):
+        self.timer = timer
+        self._state = TTLCache(max_size=max_size, ttl=3600.0, timer=timer)
+
+    def acquire(self, buckets: List[Bucket], cost: float) -> Tuple[int, float]:
+        now = self.timer()
+        levels = []
+        blocked, wait = 0, 0.0
+        for index, (key, rate, burst) in enumerate(buckets, start=1):
+            need = min(cost, burst)
+            tokens, updated = self._state.get(key) or (burst, now)
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            levels.append(tokens)
+            if tokens < need and (need - tokens) / rate > wait:
+                blocked, wait = index, (need - tokens) / rate
+        if blocked == 0:
+            for (key, rate, burst), tokens in zip(buckets, levels):
+                self._state.set(key, (tokens - min(cost, burst), now), ttl=burst / rate)
+        return blocked, wait
+
+    def clear(self) -> None:
+        self._state.clear()
+
+
+class RateLimiter:
+    """
+    Per-user and global token buckets for admitting chat requests.
+
+    Each request costs its agent type's weight (a `multi_step` request makes
+    several LLM calls, so it costs more than a `simple` one). Buckets live in
+    Redis when a URL is given, so limits hold across workers, and in process
+    otherwise. When Redis is unreachable the limiter falls back to the local
+    buckets and retries Redis after `redis_retry_after` seconds.
+    """
+
+    def __init__(
+        self,
+        user_rate: float = 1.0,
+        user_burst: float = 20.0,
+        global_rate: float = 50.0,
+        global_burst: float = 200.0,
+        costs: Optional[Dict[str, float]] = None,
+        default_cost: float = 1.0,
+        redis_url: Optional[str] = None,
+        prefix: str = "chat:ratelimit:",
+        redis_retry_after: float = 30.0,
+    ):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.costs = costs or {}
+        self.default_cost = default_cost
+        self.prefix = prefix
+        self.redis_url = redis_url
+        self.redis_retry_after = redis_retry_after
+        self.local = LocalBuckets()
+        self._redis = None
+        self._script = None
+        self._redis_down_until = 0.0
+
+    @property
+    def redis(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                self.redis_url,
+                decode_responses=True,
+                socket_connect_timeout=1.0,
+                socket_timeout=1.0,
+            )
+            self._script = self._redis.register_script(_ACQUIRE_SCRIPT)
+        return self._redis
+
+    def cost_of(self, agent_type: str) -> float:
+        return self.costs.get(agent_type, self.default_cost)
+
+    def _buckets(self, user_id: str) -> List[Bucket]:
+        # The hash tag keeps both keys in one Redis Cluster slot
+        return [
+            (f"{self.prefix}{{chat}}:user:{user_id}", self.user_rate, self.user_burst),
+            (f"{self.prefix}{{chat}}:global", self.global_rate, self.global_burst),
+        ]
+
+    async def acquire(self, user_id: str, agent_type: str) -> Tuple[bool, float]:
+        """
+        Take a request's cost from the user and global buckets.
+
+        Returns (allowed, retry_after); when not allowed, nothing is taken and
+        `retry_after` is the number of seconds until the request would fit.
+        """
+        buckets = self._buckets(user_id)
+        cost = self.cost_of(agent_type)
+        blocked, wait = None, 0.0
+        if self.redis is not None:
+            try:
+                args = [cost]
+                for _, rate, burst in buckets:
+                    args += [rate, burst]
+                blocked, wait = await self._script(
+                    keys=[key for key, _, _ in buckets], args=args
+                )
+                blocked, wait = int(blocked), float(wait)
+            except RedisError as e:
+                logger.warning(f"Rate limiter Redis backend unavailable: {e}")
+                self._redis_down_until = time.monotonic() + self.redis_retry_after
+                blocked = None
+        if blocked is None:
+            blocked, wait = self.local.acquire(buckets, cost)
+
+        result = ("allowed", "limited_user", "limited_global")[blocked]
+        # Unknown agent types are bucketed so clients cannot grow label sets
+        label = agent_type if agent_type in self.costs else "other"
+        rate_limit_requests.labels(label, result).inc()
+        return blocked == 0, wait
+
+    async def aclose(self) -> None:
+        self.local.clear()
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+rate_limiter = RateLimiter(
+    user_rate=settings.rate_limit_user_rate,
+    user_burst=settings.rate_limit_user_burst,
+    global_rate=settings.rate_limit_global_rate,
+    global_burst=settings.rate_limit_global_burst,
+    costs=settings.rate_limit_costs,
+    redis_url=settings.redis_url if settings.use_redis else None,
+)
@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -11,6 +13,12 @@
 # Initialize the password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately slow and releases the GIL, so hashing runs on a small
+# dedicated pool; its size caps how many hashes run at once per worker.
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers, thread_name_prefix="password-hash"
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -26,6 +34,24 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the hashing pool without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_executor, pwd_context.verify, plain_password, hashed_password
+    )
+
+
+async def aget_password_hash(password: str) -> str:
+    """
+    Hash a password on the hashing pool without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from .metrics import singleflight_requests
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work in its own task and later
+    callers await the same task. A caller that is cancelled (e.g. its client
+    disconnected) only stops waiting; the shared work is cancelled once no
+    caller is left waiting for it.
+    """
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            singleflight_requests.labels(name=self.name, role="leader").inc()
+        else:
+            singleflight_requests.labels(name=self.name, role="follower").inc()
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is interested any more; new callers must start afresh
+                self._forget(key, call)
+                call.task.cancel()
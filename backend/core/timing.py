@@ -0,0 +1,111 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+# Collector of the current request, or None when timing is disabled
+_timings: ContextVar[Optional["RequestTimings"]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class RequestTimings:
+    """
+    Durations recorded while handling one request, aggregated by name.
+
+    Repeated names (e.g. several LLM calls of the same kind) are summed and
+    counted. The collector is shared by every task spawned for the request,
+    since child tasks inherit the context variable holding it.
+    """
+
+    def __init__(self):
+        self._totals: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        entry = self._totals.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        Return the total milliseconds spent per name.
+        """
+        return {
+            name: round(total * 1000, 2) for name, (total, _) in self._totals.items()
+        }
+
+    def header(self) -> str:
+        """
+        Render the timings as a Server-Timing header value.
+        """
+        metrics = []
+        for name, (total, count) in self._totals.items():
+            metric = f"{name};dur={total * 1000:.2f}"
+            if count > 1:
+                metric += f';desc="{count} calls"'
+            metrics.append(metric)
+        return ", ".join(metrics)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _timings.get()
+
+
+def record(name: str, seconds: float) -> None:
+    """
+    Add a duration to the current request's timings, if it is being timed.
+    """
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Time the enclosed block under `name`. A no-op outside a timed request.
+    """
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that times each HTTP request and reports the breakdown in
+    a `Server-Timing` response header.
+
+    The header is written when the response starts, so streamed responses
+    only include what happened before the first byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timings.add("total", time.perf_counter() - start)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _timings.set(timings)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
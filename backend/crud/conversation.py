@@ -1,23 +1,266 @@
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, tuple_, update
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 
 from ..models.conversation import Conversation
 from ..models.message import Message
 
+# Maps stored message senders to chat history roles
+SENDER_ROLES = {"user": "user", "bot": "assistant"}
 
-async def save_conversation(
-    db: AsyncSession, user_id: UUID, user_message: str, bot_response: str
-):
-    conversation = Conversation(user_id=user_id)
-    db.add(conversation)
+# Position of a row in a keyset-paginated listing: (timestamp, id)
+Keyset = Tuple[datetime, uuid.UUID]
+
+
+@dataclass
+class ConversationTurn:
+    """
+    A chat turn waiting to be persisted.
+    """
+
+    conversation_id: uuid.UUID
+    user_id: uuid.UUID
+    user_message: str
+    bot_response: str
+    new_conversation: bool = False
+    user_timestamp: datetime = field(default_factory=datetime.utcnow)
+    bot_timestamp: datetime = field(default_factory=datetime.utcnow)
+
+    def __post_init__(self):
+        # Keep the reply strictly after the question when ordering by time
+        if self.bot_timestamp <= self.user_timestamp:
+            self.bot_timestamp = self.user_timestamp + timedelta(microseconds=1)
+
+
+async def get_conversation(
+    db: AsyncSession, conversation_id: UUID, user_id: UUID
+) -> Optional[Conversation]:
+    """
+    Retrieve a conversation owned by the given user.
+    """
+    result = await db.execute(
+        select(Conversation).where(
+            Conversation.id == conversation_id, Conversation.user_id == user_id
+        )
+    )
+    return result.scalars().first()
+
+
+async def get_recent_messages(
+    db: AsyncSession, conversation_id: UUID, limit: int = 20
+) -> List[Dict[str, str]]:
+    """
+    Retrieve the last `limit` messages of a conversation as chat history,
+    oldest first.
+    """
+    result = await db.execute(
+        select(Message.sender, Message.content)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.timestamp.desc())
+        .limit(limit)
+    )
+    rows = result.all()
+    return [
+        {"role": SENDER_ROLES.get(sender, "system"), "content": content}
+        for sender, content in reversed(rows)
+    ]
+
+
+async def get_unsummarized_messages(
+    db: AsyncSession,
+    conversation_id: UUID,
+    since: Optional[datetime],
+    keep: int,
+    limit: int,
+) -> List[Tuple[str, str, datetime]]:
+    """
+    Return the (sender, content, timestamp) rows of a conversation newer than
+    `since`, oldest first, topped up to the last `keep` messages and capped at
+    the last `limit`.
+    """
+    result = await db.execute(
+        select(Message.sender, Message.content, Message.timestamp)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.timestamp.desc())
+        .limit(limit)
+    )
+    rows = [tuple(row) for row in reversed(result.all())]
+    if since is None:
+        return rows
+    newer = sum(1 for _, _, timestamp in rows if timestamp > since)
+    return rows[max(0, len(rows) - max(newer, keep)) :]
+
+
+async def get_messages_to_summarize(
+    db: AsyncSession,
+    conversation_id: UUID,
+    keep: int,
+    since: Optional[datetime] = None,
+    limit: int = 40,
+) -> List[Tuple[str, str, datetime]]:
+    """
+    Return up to `limit` (sender, content, timestamp) rows, oldest first, that
+    are newer than `since` but older than the last `keep` messages.
+    """
+    # Timestamp of the oldest message still inside the verbatim window
+    window_start = (
+        select(Message.timestamp)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.timestamp.desc())
+        .offset(keep - 1)
+        .limit(1)
+        .scalar_subquery()
+    )
+    query = select(Message.sender, Message.content, Message.timestamp).where(
+        Message.conversation_id == conversation_id,
+        Message.timestamp < window_start,
+    )
+    if since is not None:
+        query = query.where(Message.timestamp > since)
+    result = await db.execute(query.order_by(Message.timestamp).limit(limit))
+    return [tuple(row) for row in result.all()]
+
+
+async def update_conversation_summary(
+    db: AsyncSession,
+    conversation_id: UUID,
+    summary: str,
+    summarized_until: datetime,
+    previous_until: Optional[datetime] = None,
+) -> bool:
+    """
+    Store a new rolling summary, provided the stored one still ends at
+    `previous_until`. Returns False if another writer got there first.
+    """
+    if previous_until is None:
+        unchanged = Conversation.summarized_until.is_(None)
+    else:
+        unchanged = Conversation.summarized_until == previous_until
+    result = await db.execute(
+        update(Conversation)
+        .where(Conversation.id == conversation_id, unchanged)
+        .values(summary=summary, summarized_until=summarized_until)
+    )
     await db.commit()
-    await db.refresh(conversation)
+    return result.rowcount == 1
+
+
+async def list_conversations(
+    db: AsyncSession, user_id: UUID, limit: int = 20, before: Optional[Keyset] = None
+) -> List[Tuple[uuid.UUID, datetime]]:
+    """
+    List a user's conversations as (id, created_at) rows, newest first.
+
+    Pages are fetched by keyset on (created_at, id): pass the last row of the
+    previous page as `before` to continue after it.
+    """
+    query = select(Conversation.id, Conversation.created_at).where(
+        Conversation.user_id == user_id
+    )
+    if before is not None:
+        query = query.where(tuple_(Conversation.created_at, Conversation.id) < before)
+    result = await db.execute(
+        query.order_by(Conversation.created_at.desc(), Conversation.id.desc()).limit(
+            limit
+        )
+    )
+    return [tuple(row) for row in result.all()]
 
-    user_msg = Message(
-        conversation_id=conversation.id, sender="user", content=user_message
+
+async def list_messages(
+    db: AsyncSession,
+    conversation_id: UUID,
+    limit: int = 50,
+    after: Optional[Keyset] = None,
+) -> List[Tuple[uuid.UUID, str, str, datetime]]:
+    """
+    List a conversation's messages as (id, sender, content, timestamp) rows,
+    oldest first.
+
+    Pages are fetched by keyset on (timestamp, id): pass the last row of the
+    previous page as `after` to continue after it.
+    """
+    query = select(
+        Message.id, Message.sender, Message.content, Message.timestamp
+    ).where(Message.conversation_id == conversation_id)
+    if after is not None:
+        query = query.where(tuple_(Message.timestamp, Message.id) > after)
+    result = await db.execute(
+        query.order_by(Message.timestamp, Message.id).limit(limit)
     )
-    bot_msg = Message(
-        conversation_id=conversation.id, sender="bot", content=bot_response
+    return [tuple(row) for row in result.all()]
+
+
+async def save_conversation(
+    db: AsyncSession,
+    user_id: UUID,
+    user_message: str,
+    bot_response: str,
+    conversation_id: Optional[UUID] = None,
+) -> UUID:
+    """
+    Save a chat turn, appending to `conversation_id` when given or starting a
+    new conversation otherwise. Returns the conversation id.
+
+    Ids are generated here, so the conversation and both messages are written
+    in a single transaction without a refresh round-trip.
+    """
+    turn = ConversationTurn(
+        conversation_id=conversation_id or uuid.uuid4(),
+        user_id=user_id,
+        user_message=user_message,
+        bot_response=bot_response,
+        new_conversation=conversation_id is None,
     )
-    db.add_all([user_msg, bot_msg])
+    await save_conversation_turns(db, [turn])
+    return turn.conversation_id
+
+
+async def save_conversation_turns(
+    db: AsyncSession, turns: Sequence[ConversationTurn]
+) -> None:
+    """
+    Persist a batch of chat turns in one transaction, using a single
+    multi-row INSERT for new conversations and one for all messages.
+    """
+    conversations = [
+        {
+            "id": turn.conversation_id,
+            "user_id": turn.user_id,
+            "created_at": turn.user_timestamp,
+        }
+        for turn in turns
+        if turn.new_conversation
+    ]
+    messages = []
+    for turn in turns:
+        messages.append(
+            {
+                "id": uuid.uuid4(),
+                "conversation_id": turn.conversation_id,
+                "sender": "user",
+                "content": turn.user_message,
+                "timestamp": turn.user_timestamp,
+            }
+        )
+        messages.append(
+            {
+                "id": uuid.uuid4(),
+                "conversation_id": turn.conversation_id,
+                "sender": "bot",
+                "content": turn.bot_response,
+                "timestamp": turn.bot_timestamp,
+            }
+        )
+
+    if conversations:
+        await db.execute(insert(Conversation).values(conversations))
+    if messages:
+        await db.execute(insert(Message).values(messages))
     await db.commit()
@@ -0,0 +1,153 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..models.job import Job
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+async def create_job(db: AsyncSession, user_id: UUID, request: Dict[str, Any]) -> Job:
+    now = datetime.utcnow()
+    job = Job(
+        user_id=user_id,
+        status=QUEUED,
+        request=request,
+        progress=[],
+        attempts=0,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    await db.commit()
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: UUID, user_id: UUID) -> Optional[Job]:
+    """
+    Return the job if it exists and belongs to `user_id`, reading it afresh
+    even if the session has seen it before.
+    """
+    result = await db.execute(
+        select(Job)
+        .where(Job.id == job_id, Job.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+async def claim_next_job(db: AsyncSession, candidates: int = 5) -> Optional[Job]:
+    """
+    Mark the oldest queued job as running and return it.
+
+    The claim is a compare-and-set on the status, so concurrent workers (in
+    this or another process) never run the same job twice.
+    """
+    result = await db.execute(
+        select(Job.id)
+        .where(Job.status == QUEUED)
+        .order_by(Job.created_at)
+        .limit(candidates)
+    )
+    for job_id in result.scalars().all():
+        now = datetime.utcnow()
+        claimed = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == QUEUED)
+            .values(
+                status=RUNNING,
+                attempts=Job.attempts + 1,
+                started_at=now,
+                updated_at=now,
+            )
+        )
+        await db.commit()
+        if claimed.rowcount == 1:
+            result = await db.execute(
+                select(Job)
+                .where(Job.id == job_id)
+                .execution_options(populate_existing=True)
+            )
+            return result.scalar_one()
+    return None
+
+
+async def update_job_progress(
+    db: AsyncSession, job_id: UUID, attempt: int, progress: List[Dict[str, Any]]
+) -> None:
+    await db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == RUNNING, Job.attempts == attempt)
+        .values(progress=progress, updated_at=datetime.utcnow())
+    )
+    await db.commit()
+
+
+async def finish_job(
+    db: AsyncSession,
+    job_id: UUID,
+    attempt: int,
+    response: Optional[str] = None,
+    conversation_id: Optional[UUID] = None,
+    error: Optional[str] = None,
+) -> bool:
+    """
+    Record the outcome of `attempt` of a running job. Not committed, so the
+    caller can save the conversation turn in the same transaction.
+
+    Returns False if that attempt is no longer the running one (the job was
+    requeued as stale meanwhile), in which case nothing changed.
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == RUNNING, Job.attempts == attempt)
+        .values(
+            status=FAILED if error is not None else SUCCEEDED,
+            response=response,
+            conversation_id=conversation_id,
+            error=error,
+            finished_at=now,
+            updated_at=now,
+        )
+    )
+    return result.rowcount == 1
+
+
+async def requeue_jobs(
+    db: AsyncSession,
+    started_before: datetime,
+    max_attempts: int,
+    job_ids: Optional[List[UUID]] = None,
+) -> int:
+    """
+    Put running jobs started before `started_before` (a stalled or stopped
+    worker) back in the queue, or fail them once they used `max_attempts`.
+    Restrict to `job_ids` when given. Returns how many were requeued.
+    """
+    stalled = [Job.status == RUNNING, Job.started_at < started_before]
+    if job_ids is not None:
+        stalled.append(Job.id.in_(job_ids))
+    now = datetime.utcnow()
+    await db.execute(
+        update(Job)
+        .where(*stalled, Job.attempts >= max_attempts)
+        .values(
+            status=FAILED,
+            error="The job was interrupted too many times.",
+            finished_at=now,
+            updated_at=now,
+        )
+    )
+    result = await db.execute(
+        update(Job)
+        .where(*stalled, Job.attempts < max_attempts)
+        .values(status=QUEUED, progress=[], updated_at=now)
+    )
+    await db.commit()
+    return result.rowcount
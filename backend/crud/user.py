@@ -1,9 +1,10 @@
 from typing import Optional
 
+from sqlalchemy import case, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from ..core.security import get_password_hash, verify_password
+from ..core.security import aget_password_hash, averify_password
 from ..models.user import User
 from ..schemas.user import UserCreate
 
@@ -24,11 +25,25 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     return result.scalars().first()
 
 
+async def get_user_by_login(db: AsyncSession, login: str) -> Optional[User]:
+    """
+    Retrieve a user by username or email in a single query, preferring a
+    username match.
+    """
+    result = await db.execute(
+        select(User)
+        .where(or_(User.username == login, User.email == login))
+        .order_by(case((User.username == login, 0), else_=1))
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
 async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
     """
     Create a new user in the database.
     """
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await aget_password_hash(user_in.password)
     new_user = User(
         email=user_in.email,
         username=user_in.username,
@@ -47,12 +62,10 @@ async def authenticate_user(
     """
     Authenticate a user by username/email and password.
     """
-    user = await get_user_by_username(db, username)
-    if not user:
-        user = await get_user_by_email(db, username)
+    user = await get_user_by_login(db, username)
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await averify_password(password, user.password_hash):
         return None
     if not user.is_active:
         return None
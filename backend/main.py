@@ -1,19 +1,34 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-from .core.database import init_db
-from .routers import auth_router, chatbot_router
+from .core.config import settings
+from .core.rate_limit import rate_limiter
+from .core.timing import ServerTimingMiddleware
+from .routers import auth_router, chatbot_router, conversations_router, jobs_router
+from .services.chatbot_service.llm_registry import llm_registry
+from .services.chatbot_service.response_cache import response_cache
+from .services.conversation_summarizer import conversation_summarizer
+from .services.conversation_writer import conversation_writer
+from .services.job_runner import job_runner
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     try:
-        await init_db()
+        await llm_registry.warm_up(settings.llm_warmup_models)
+        await conversation_writer.start()
+        await job_runner.start()
         yield
     finally:
-        pass
+        await job_runner.stop()
+        await conversation_summarizer.stop()
+        await conversation_writer.stop()
+        await response_cache.aclose()
+        await rate_limiter.aclose()
+        await llm_registry.aclose()
 
 
 app = FastAPI(
@@ -32,8 +47,13 @@ async def lifespan(app: FastAPI):
     allow_headers=["*"],
 )
 
+if settings.server_timing_enabled:
+    app.add_middleware(ServerTimingMiddleware)
+
 app.include_router(auth_router)
 app.include_router(chatbot_router)
+app.include_router(conversations_router)
+app.include_router(jobs_router)
 
 
 @app.get("/health", tags=["Health"])
@@ -44,3 +64,11 @@ async def read_root():
     - **Returns**: Status of the application.
     """
     return {"status": "OK"}
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics endpoint.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
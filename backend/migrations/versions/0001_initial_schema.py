@@ -0,0 +1,59 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-10-01 00:00:00
+
+Matches the tables previously created by `Base.metadata.create_all`.
+Databases created that way should be marked with `alembic stamp 0001`
+before upgrading.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False, unique=True),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("username", sa.String()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "conversations",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id")),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_table(
+        "messages",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "conversation_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("conversations.id"),
+        ),
+        sa.Column("sender", sa.String(), nullable=False),
+        sa.Column("content", sa.String(), nullable=False),
+        sa.Column("timestamp", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("messages")
+    op.drop_table("conversations")
+    op.drop_table("users")
@@ -0,0 +1,39 @@
+"""indexes for hot queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-10-15 00:00:00
+
+- users.username: looked up on every authenticated request; also made unique.
+- conversations.user_id: conversation ownership and listing per user.
+- messages (conversation_id, timestamp): loading a conversation's history.
+
+The unique index on username fails if duplicate usernames already exist;
+resolve those before upgrading.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_conversations_user_id", "conversations", ["user_id"])
+    op.create_index(
+        "ix_messages_conversation_id_timestamp",
+        "messages",
+        ["conversation_id", "timestamp"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_conversation_id_timestamp", table_name="messages")
+    op.drop_index("ix_conversations_user_id", table_name="conversations")
+    op.drop_index("ix_users_username", table_name="users")
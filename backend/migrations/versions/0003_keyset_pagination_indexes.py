@@ -0,0 +1,48 @@
+"""indexes for keyset pagination
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-10-22 00:00:00
+
+Extends the conversation listing and message history indexes with the
+columns the listings order by, so each page is a single index range scan:
+
+- conversations (user_id, created_at, id) replaces (user_id).
+- messages (conversation_id, timestamp, id) replaces (conversation_id, timestamp).
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_conversations_user_id_created_at_id",
+        "conversations",
+        ["user_id", "created_at", "id"],
+    )
+    op.drop_index("ix_conversations_user_id", table_name="conversations")
+    op.create_index(
+        "ix_messages_conversation_id_timestamp_id",
+        "messages",
+        ["conversation_id", "timestamp", "id"],
+    )
+    op.drop_index("ix_messages_conversation_id_timestamp", table_name="messages")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_messages_conversation_id_timestamp",
+        "messages",
+        ["conversation_id", "timestamp"],
+    )
+    op.drop_index("ix_messages_conversation_id_timestamp_id", table_name="messages")
+    op.create_index("ix_conversations_user_id", "conversations", ["user_id"])
+    op.drop_index("ix_conversations_user_id_created_at_id", table_name="conversations")
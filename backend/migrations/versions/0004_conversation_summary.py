@@ -0,0 +1,33 @@
+"""rolling conversation summary
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-10-24 00:00:00
+
+Adds the summary of older messages kept with each conversation and the
+timestamp of the last message it covers.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("conversations", sa.Column("summary", sa.Text(), nullable=True))
+    op.add_column(
+        "conversations", sa.Column("summarized_until", sa.DateTime(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("conversations") as batch_op:
+        batch_op.drop_column("summarized_until")
+        batch_op.drop_column("summary")
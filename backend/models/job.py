@@ -0,0 +1,31 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+
+from ..core.database import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers claim the oldest queued job first
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    status = Column(String, nullable=False)  # queued, running, succeeded or failed
+    # The ChatRequest, with the conversation history resolved at submission
+    request = Column(JSON, nullable=False)
+    # Progress events of the run so far (decomposition, subtask results, ...)
+    progress = Column(JSON, nullable=False, default=list)
+    response = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    conversation_id = Column(UUID(as_uuid=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
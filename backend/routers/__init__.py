@@ -1,4 +1,6 @@
 from .auth import router as auth_router
 from .chatbot import router as chatbot_router
+from .conversations import router as conversations_router
+from .jobs import router as jobs_router
 
-__all__ = ["auth_router", "chatbot_router"]
+__all__ = ["auth_router", "chatbot_router", "conversations_router", "jobs_router"]
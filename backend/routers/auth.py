@@ -7,6 +7,7 @@
 from ..core.config import settings
 from ..core.database import get_session
 from ..core.security import create_access_token, decode_access_token
+from ..core.timing import timed
 from ..crud.user import (
     authenticate_user,
     create_user,
@@ -16,6 +17,7 @@
 from ..models.user import User
 from ..schemas.token import Token
 from ..schemas.user import UserCreate, UserOut
+from ..services.principal_cache import principal_cache
 
 # OAuth2 scheme for extracting the token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
@@ -29,6 +31,9 @@ async def get_current_user(
 ) -> User:
     """
     Retrieve the current user based on the JWT token.
+
+    Users are served from the principal cache when possible to avoid a
+    database lookup on every request.
     """
     payload = decode_access_token(token)
     username: str = payload.get("sub")
@@ -38,13 +43,17 @@ async def get_current_user(
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = await get_user_by_username(db, username=username)
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    with timed("auth"):
+        user = principal_cache.get(username)
+        if user is None:
+            user = await get_user_by_username(db, username=username)
+            if user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            principal_cache.set(username, user)
     return user
 
 
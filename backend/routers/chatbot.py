@@ -1,13 +1,48 @@
+import asyncio
+import json
+import math
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import logger
-from ..core.database import get_session
-from ..crud.conversation import save_conversation
+from ..core.config import settings
+from ..core.database import async_session_maker, get_session
+from ..core.metrics import (
+    chat_request_seconds,
+    chat_requests,
+    conversation_save_seconds,
+)
+from ..core.rate_limit import rate_limiter
+from ..core.timing import current_timings, record, timed
+from ..crud.conversation import (
+    ConversationTurn,
+    save_conversation,
+    save_conversation_turns,
+)
 from ..models.user import User
 from ..routers.auth import get_current_active_user
-from ..schemas.chatbot import ChatRequest, ChatResponse, FeedbackRequest
+from ..schemas.chatbot import (
+    ChatBatchRequest,
+    ChatBatchResult,
+    ChatBatchSummary,
+    ChatRequest,
+    ChatResponse,
+    FeedbackRequest,
+)
 from ..services.chatbot_service import ChatbotService
+from ..services.chatbot_service.base_workflow import FALLBACK_RESPONSE
+from ..services.chatbot_service.llm_scheduler import llm_user
+from ..services.chatbot_service.workflow_factory import WORKFLOW_TYPES
+from ..services.conversation_history import conversation_history
+from ..services.conversation_summarizer import conversation_summarizer
+from ..services.conversation_writer import conversation_writer
 from .auth import oauth2_scheme
 
 chatbot_service = ChatbotService()
@@ -19,33 +54,394 @@
     responses={404: {"description": "Not found"}},
 )
 
-@router.post("/chat", response_model=ChatResponse)
+
+async def admit_chat_request(
+    chat_request: ChatRequest,
+    current_user: User = Depends(get_current_active_user),
+) -> None:
+    """
+    Reject the request with 429 and a Retry-After header when the user or the
+    whole service is over its rate limit, instead of queueing it.
+    """
+    if not settings.rate_limit_enabled:
+        return
+    allowed, retry_after = await rate_limiter.acquire(
+        str(current_user.id), chat_request.agent_type
+    )
+    if not allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests. Please retry later.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+async def _load_history(
+    chat_request: ChatRequest, db: AsyncSession, current_user: User
+) -> List[Dict[str, str]]:
+    """
+    Use the stored history when continuing a conversation, otherwise the
+    history sent by the client.
+    """
+    if chat_request.conversation_id is None:
+        return chat_request.history
+    with timed("history"):
+        return await conversation_history.load(
+            db, chat_request.conversation_id, current_user.id
+        )
+
+
+def _record_request(
+    endpoint: str, agent_type: str, result: str, started_at: float
+) -> None:
+    # Unknown agent types are bucketed so clients cannot grow label sets
+    agent_type = agent_type if agent_type in WORKFLOW_TYPES else "invalid"
+    chat_requests.labels(endpoint, agent_type, result).inc()
+    chat_request_seconds.labels(endpoint, agent_type).observe(
+        time.perf_counter() - started_at
+    )
+
+
+def _result_of(response: str) -> str:
+    return "fallback" if response == FALLBACK_RESPONSE else "ok"
+
+
+def _response_metadata(chat_request: ChatRequest) -> Dict[str, Any]:
+    """
+    Echo the request metadata, adding the timing breakdown when the client
+    asked for it with `timings: true`.
+    """
+    metadata = chat_request.metadata or {}
+    timings = current_timings()
+    if metadata.get("timings") and timings is not None:
+        metadata = {**metadata, "timings": timings.as_dict()}
+    return metadata
+
+
+async def _save_turn(
+    db: AsyncSession,
+    chat_request: ChatRequest,
+    current_user: User,
+    response: str,
+    received_at: datetime,
+) -> UUID:
+    """
+    Persist a chat turn and return its conversation id.
+
+    Turns go through the write-behind queue when it is running and are
+    written directly otherwise.
+    """
+    start = time.perf_counter()
+    mode = "queued" if conversation_writer.running else "direct"
+    if mode == "queued":
+        conversation_id = chat_request.conversation_id or uuid.uuid4()
+        await conversation_writer.enqueue(
+            ConversationTurn(
+                conversation_id=conversation_id,
+                user_id=current_user.id,
+                user_message=chat_request.prompt,
+                bot_response=response,
+                new_conversation=chat_request.conversation_id is None,
+                user_timestamp=received_at,
+            )
+        )
+    else:
+        conversation_id = await save_conversation(
+            db,
+            current_user.id,
+            chat_request.prompt,
+            response,
+            conversation_id=chat_request.conversation_id,
+        )
+    elapsed = time.perf_counter() - start
+    conversation_save_seconds.labels(mode).observe(elapsed)
+    record("db_save", elapsed)
+    conversation_history.append(
+        conversation_id,
+        current_user.id,
+        chat_request.prompt,
+        response,
+        new=chat_request.conversation_id is None,
+    )
+    if settings.conversation_summary_enabled and chat_request.conversation_id:
+        # Fold messages leaving the history window into the summary
+        conversation_summarizer.schedule(conversation_id)
+    return conversation_id
+
+
+@router.post(
+    "/chat", response_model=ChatResponse, dependencies=[Depends(admit_chat_request)]
+)
 async def chat_endpoint(
     chat_request: ChatRequest,
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
+    started_at = time.perf_counter()
+    received_at = datetime.utcnow()
+    # Queue this request's LLM calls fairly against other users' calls
+    llm_user.set(str(current_user.id))
+    history = await _load_history(chat_request, db, current_user)
     try:
         result = await chatbot_service.process_request(
             user_input=chat_request.prompt.strip(),
             workflow_type=chat_request.agent_type,
-            history=chat_request.history,
+            history=history,
+            model=chat_request.model,
+            use_cache=not (chat_request.metadata or {}).get("no_cache", False),
         )
 
         response_text = str(result).strip()
 
         # Save the conversation
-        await save_conversation(db, current_user.id, chat_request.prompt, response_text)
+        conversation_id = await _save_turn(
+            db, chat_request, current_user, response_text, received_at
+        )
+
+        _record_request(
+            "chat", chat_request.agent_type, _result_of(response_text), started_at
+        )
+        return ChatResponse(
+            response=response_text,
+            conversation_id=conversation_id,
+            metadata=_response_metadata(chat_request),
+        )
+
+    except Exception as e:
+        logger.error(f"Chatbot error: {e}")
+        _record_request("chat", chat_request.agent_type, "error", started_at)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while processing your request.",
+        )
+
 
-        return ChatResponse(response=response_text, metadata=chat_request.metadata)
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
+
+@router.post("/chat/stream", dependencies=[Depends(admit_chat_request)])
+async def chat_stream_endpoint(
+    chat_request: ChatRequest,
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Stream the chat response as Server-Sent Events.
+
+    Emits `progress` events for workflow steps, `token` events for the final
+    answer and a `done` event. Once the conversation is saved a final `saved`
+    event carries its id.
+    """
+    started_at = time.perf_counter()
+    received_at = datetime.utcnow()
+    # Queue this request's LLM calls fairly against other users' calls
+    llm_user.set(str(current_user.id))
+    history = await _load_history(chat_request, db, current_user)
+    try:
+        events = chatbot_service.stream_request(
+            user_input=chat_request.prompt.strip(),
+            workflow_type=chat_request.agent_type,
+            history=history,
+            model=chat_request.model,
+            use_cache=not (chat_request.metadata or {}).get("no_cache", False),
+        )
     except Exception as e:
         logger.error(f"Chatbot error: {e}")
+        _record_request("chat_stream", chat_request.agent_type, "error", started_at)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while processing your request.",
         )
 
+    async def event_stream():
+        response_text = None
+        result = "cancelled"
+        try:
+            async for event, data in events:
+                if event == "done":
+                    response_text = str(data["response"]).strip()
+                    data = {
+                        **data,
+                        "response": response_text,
+                        "metadata": _response_metadata(chat_request),
+                    }
+                yield _format_sse(event, data)
+            result = _result_of(response_text)
+        except Exception as e:
+            logger.error(f"Chatbot stream error: {e}")
+            result = "error"
+            yield _format_sse(
+                "error", {"detail": "An error occurred while processing your request."}
+            )
+            return
+        finally:
+            # Also counts clients that disconnected mid-stream as cancelled
+            _record_request("chat_stream", chat_request.agent_type, result, started_at)
+
+        # The request-scoped session is gone once streaming starts
+        try:
+            async with async_session_maker() as session:
+                conversation_id = await _save_turn(
+                    session, chat_request, current_user, response_text, received_at
+                )
+            yield _format_sse("saved", {"conversation_id": str(conversation_id)})
+        except Exception as e:
+            logger.error(f"Failed to save streamed conversation: {e}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _wait_for_admission(current_user: User, agent_type: str) -> None:
+    """
+    Pace a batch item through the rate limiter, waiting rather than failing
+    when the user or the service is over its limit.
+    """
+    if not settings.rate_limit_enabled:
+        return
+    while True:
+        allowed, retry_after = await rate_limiter.acquire(
+            str(current_user.id), agent_type
+        )
+        if allowed:
+            return
+        await asyncio.sleep(retry_after)
+
+
+async def _save_batch(turns: List[ConversationTurn]) -> bool:
+    """
+    Persist the turns of a batch with one bulk write. Returns whether it
+    succeeded.
+    """
+    if not turns:
+        return True
+    start = time.perf_counter()
+    try:
+        async with async_session_maker() as session:
+            await save_conversation_turns(session, turns)
+    except Exception as e:
+        logger.error(f"Failed to save chat batch: {e}")
+        return False
+    conversation_save_seconds.labels("batch").observe(time.perf_counter() - start)
+    for turn in turns:
+        conversation_history.append(
+            turn.conversation_id,
+            turn.user_id,
+            turn.user_message,
+            turn.bot_response,
+            new=turn.new_conversation,
+        )
+        if settings.conversation_summary_enabled and not turn.new_conversation:
+            conversation_summarizer.schedule(turn.conversation_id)
+    return True
+
+
+@router.post("/chat/batch")
+async def chat_batch_endpoint(
+    batch: ChatBatchRequest,
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Run a batch of chat requests and stream the results as NDJSON.
+
+    Up to `chat_batch_concurrency` items run at once, each paced by the rate
+    limiter. A `result` line is sent as soon as an item completes, so lines
+    arrive out of order; `index` points back into the batch. Items that
+    continue a conversation see its history as of the start of the batch.
+    Once every item is done, all turns are saved with one bulk write and a
+    final `summary` line reports the outcome.
+    """
+    if len(batch.requests) > settings.chat_batch_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch holds at most {settings.chat_batch_max_size} requests.",
+        )
+    llm_user.set(str(current_user.id))
+
+    # The request-scoped session is gone once streaming starts
+    histories: List[Optional[List[Dict[str, str]]]] = []
+    for chat_request in batch.requests:
+        try:
+            histories.append(await _load_history(chat_request, db, current_user))
+        except HTTPException:
+            histories.append(None)
+
+    semaphore = asyncio.Semaphore(settings.chat_batch_concurrency)
+
+    async def run_item(index: int) -> Tuple[ChatBatchResult, Optional[datetime]]:
+        chat_request = batch.requests[index]
+        if histories[index] is None:
+            return ChatBatchResult(index=index, error="Conversation not found"), None
+        async with semaphore:
+            await _wait_for_admission(current_user, chat_request.agent_type)
+            started_at = time.perf_counter()
+            received_at = datetime.utcnow()
+            try:
+                response = await chatbot_service.process_request(
+                    user_input=chat_request.prompt.strip(),
+                    workflow_type=chat_request.agent_type,
+                    history=histories[index],
+                    model=chat_request.model,
+                    use_cache=not (chat_request.metadata or {}).get("no_cache", False),
+                )
+            except Exception as e:
+                logger.error(f"Chatbot batch error: {e}")
+                _record_request(
+                    "chat_batch", chat_request.agent_type, "error", started_at
+                )
+                error = "An error occurred while processing your request."
+                return ChatBatchResult(index=index, error=error), None
+        response = str(response).strip()
+        _record_request(
+            "chat_batch", chat_request.agent_type, _result_of(response), started_at
+        )
+        conversation_id = chat_request.conversation_id or uuid.uuid4()
+        result = ChatBatchResult(
+            index=index, response=response, conversation_id=conversation_id
+        )
+        return result, received_at
+
+    async def result_stream():
+        tasks = [
+            asyncio.create_task(run_item(index)) for index in range(len(batch.requests))
+        ]
+        turns: List[ConversationTurn] = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result, received_at = await next_done
+                if result.error is None:
+                    chat_request = batch.requests[result.index]
+                    turns.append(
+                        ConversationTurn(
+                            conversation_id=result.conversation_id,
+                            user_id=current_user.id,
+                            user_message=chat_request.prompt,
+                            bot_response=result.response,
+                            new_conversation=chat_request.conversation_id is None,
+                            user_timestamp=received_at,
+                        )
+                    )
+                yield result.model_dump_json() + "\n"
+        finally:
+            # Stops the remaining items when the client goes away
+            for task in tasks:
+                task.cancel()
+
+        summary = ChatBatchSummary(
+            completed=len(turns),
+            failed=len(tasks) - len(turns),
+            saved=await _save_batch(turns),
+        )
+        yield summary.model_dump_json() + "\n"
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
 @router.post("/feedback")
 async def feedback_endpoint(
     feedback: FeedbackRequest,
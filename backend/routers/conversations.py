@@ -0,0 +1,115 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.database import get_session
+from ..crud.conversation import (
+    SENDER_ROLES,
+    Keyset,
+    get_conversation,
+    list_conversations,
+    list_messages,
+)
+from ..models.user import User
+from ..routers.auth import get_current_active_user
+from ..schemas.conversation import (
+    ConversationOut,
+    ConversationPage,
+    MessageOut,
+    MessagePage,
+)
+
+router = APIRouter(
+    prefix="/api/v1/conversations",
+    tags=["Conversations"],
+    dependencies=[Depends(get_current_active_user)],
+    responses={404: {"description": "Not found"}},
+)
+
+
+def _encode_cursor(timestamp: datetime, row_id: UUID) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[Keyset]:
+    if cursor is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        timestamp, row_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), UUID(row_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+@router.get("", response_model=ConversationPage)
+async def list_conversations_endpoint(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    List the current user's conversations, most recent first.
+    """
+    # Fetch one extra row to know whether another page exists
+    rows = await list_conversations(
+        db, current_user.id, limit=limit + 1, before=_decode_cursor(cursor)
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        conversation_id, created_at = rows[-1]
+        next_cursor = _encode_cursor(created_at, conversation_id)
+    return ConversationPage(
+        items=[
+            ConversationOut(id=conversation_id, created_at=created_at)
+            for conversation_id, created_at in rows
+        ],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/{conversation_id}/messages", response_model=MessagePage)
+async def list_messages_endpoint(
+    conversation_id: UUID,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    List the messages of one of the current user's conversations, oldest first.
+    """
+    after = _decode_cursor(cursor)
+    if await get_conversation(db, conversation_id, current_user.id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found"
+        )
+
+    rows = await list_messages(db, conversation_id, limit=limit + 1, after=after)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        message_id, _, _, timestamp = rows[-1]
+        next_cursor = _encode_cursor(timestamp, message_id)
+    return MessagePage(
+        items=[
+            MessageOut(
+                id=message_id,
+                role=SENDER_ROLES.get(sender, "system"),
+                content=content,
+                timestamp=timestamp,
+            )
+            for message_id, sender, content, timestamp in rows
+        ],
+        next_cursor=next_cursor,
+    )
@@ -0,0 +1,93 @@
+import time
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.database import get_session
+from ..crud.job import ACTIVE_STATUSES, create_job, get_job
+from ..models.user import User
+from ..routers.auth import get_current_active_user
+from ..schemas.chatbot import ChatRequest
+from ..schemas.job import JobOut
+from ..services.chatbot_service.workflow_factory import WORKFLOW_TYPES
+from ..services.conversation_history import conversation_history
+from ..services.job_runner import job_runner
+from .chatbot import admit_chat_request
+
+router = APIRouter(
+    prefix="/api/v1/jobs",
+    tags=["Jobs"],
+    dependencies=[Depends(get_current_active_user)],
+    responses={404: {"description": "Not found"}},
+)
+
+
+async def _fetch_job(job_id: UUID, user_id: UUID):
+    # A short session per read, so long-polls do not hold a connection
+    async with job_runner.session_maker() as db:
+        return await get_job(db, job_id, user_id)
+
+
+@router.post(
+    "",
+    response_model=JobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(admit_chat_request)],
+)
+async def submit_job_endpoint(
+    chat_request: ChatRequest,
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Queue a chat request for the background workers and return the job at
+    once. Poll `GET /api/v1/jobs/{id}` for its progress and answer.
+    """
+    if chat_request.agent_type not in WORKFLOW_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid agent type: {chat_request.agent_type}",
+        )
+    history = chat_request.history
+    if chat_request.conversation_id is not None:
+        history = await conversation_history.load(
+            db, chat_request.conversation_id, current_user.id
+        )
+    request = chat_request.model_copy(update={"history": history})
+    job = await create_job(db, current_user.id, request.model_dump(mode="json"))
+    job_runner.notify_submitted()
+    return JobOut.model_validate(job)
+
+
+@router.get("/{job_id}", response_model=JobOut)
+async def get_job_endpoint(
+    job_id: UUID,
+    wait: float = Query(
+        0,
+        ge=0,
+        description="Long-poll: wait up to this many seconds for the job to change.",
+    ),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Return a job's status, its progress so far and, once finished, the answer.
+
+    With `wait`, the response is sent as soon as the job records new progress
+    or changes status, or after `wait` seconds (at most `job_long_poll_max`).
+    """
+    deadline = time.monotonic() + min(wait, settings.job_long_poll_max)
+    job = await _fetch_job(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+    seen = job.updated_at
+    while job.status in ACTIVE_STATUSES and job.updated_at == seen:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            break
+        await job_runner.wait_for_update(job_id, min(left, job_runner.poll_interval))
+        job = await _fetch_job(job_id, current_user.id)
+    return JobOut.model_validate(job)
@@ -1,4 +1,5 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
+from uuid import UUID
 
 from pydantic import BaseModel, Field
 
@@ -10,13 +11,24 @@ class ChatRequest(BaseModel):
         description="Type of agent to use: 'multi_step', 'prompt_optim', or 'simple'",
     )
     history: Optional[List[Dict[str, str]]] = Field(default_factory=list)
-    metadata: Optional[Dict[str, Any]] = Field(default_factory=dict)
+    conversation_id: Optional[UUID] = Field(
+        default=None,
+        description="Continue a stored conversation. Its recent history is loaded server-side and 'history' is ignored.",
+    )
+    metadata: Optional[Dict[str, Any]] = Field(
+        default_factory=dict,
+        description="Free-form request metadata. Set 'no_cache' to true to bypass the response cache and 'timings' to true to get a timing breakdown in the response metadata.",
+    )
     model: str = Field(
         ...,
         description="The model to use for the chat. If not specified, the default model for the agent type will be used.",
     )
 
 
+class ChatBatchRequest(BaseModel):
+    requests: List[ChatRequest] = Field(..., min_length=1)
+
+
 class FeedbackRequest(BaseModel):
     message_id: int
     is_positive: bool
@@ -24,4 +36,20 @@ class FeedbackRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     response: str
+    conversation_id: Optional[UUID] = None
     metadata: Optional[Dict[str, Any]] = {}
+
+
+class ChatBatchResult(BaseModel):
+    type: Literal["result"] = "result"
+    index: int
+    response: Optional[str] = None
+    conversation_id: Optional[UUID] = None
+    error: Optional[str] = None
+
+
+class ChatBatchSummary(BaseModel):
+    type: Literal["summary"] = "summary"
+    completed: int
+    failed: int
+    saved: bool
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class ConversationOut(BaseModel):
+    id: UUID
+    created_at: datetime
+
+
+class MessageOut(BaseModel):
+    id: UUID
+    role: str
+    content: str
+    timestamp: datetime
+
+
+class ConversationPage(BaseModel):
+    items: List[ConversationOut]
+    next_cursor: Optional[str] = Field(
+        default=None,
+        description="Pass as 'cursor' to fetch the next page. Null on the last page.",
+    )
+
+
+class MessagePage(BaseModel):
+    items: List[MessageOut]
+    next_cursor: Optional[str] = Field(
+        default=None,
+        description="Pass as 'cursor' to fetch the next page. Null on the last page.",
+    )
@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class JobOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    status: str = Field(
+        ..., description="One of 'queued', 'running', 'succeeded' or 'failed'."
+    )
+    progress: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Progress events so far, e.g. the subtasks and their results.",
+    )
+    response: Optional[str] = None
+    conversation_id: Optional[UUID] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,3 +1,4 @@
 from .chatbot_service import ChatbotService
+from .workflow_pool import WorkflowPool
 
-__all__ = ["ChatbotService"]
+__all__ = ["ChatbotService", "WorkflowPool"]
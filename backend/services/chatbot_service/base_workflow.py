@@ -1,9 +1,136 @@
+import asyncio
+import functools
+import time
 from abc import ABC, ABCMeta, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
+from llama_index.core.llms import ChatMessage
+from llama_index.core.memory import ChatMemoryBuffer
 from llama_index.core.workflow import Workflow
-from llama_index.llms.gemini import Gemini
-from llama_index.llms.groq import Groq
-from llama_index.llms.openai import OpenAI
+
+from ...core.metrics import (
+    llm_call_errors,
+    llm_call_seconds,
+    llm_hedge_requests,
+    llm_hedge_wins,
+    llm_time_to_first_token_seconds,
+    llm_tokens_per_second,
+    workflow_step_errors,
+    workflow_step_seconds,
+)
+from ...core.config import settings
+from ...core.timing import record
+from .hedging import hedged, latency_tracker
+from .llm_registry import DEFAULT_MODEL, llm_registry, resolve_model
+from .llm_scheduler import llm_scheduler
+from .resilience import request_deadline, resilient_caller
+
+# Returned by the workflows when a request fails
+FALLBACK_RESPONSE = (
+    "I apologize, but I encountered an error while processing your request. "
+    "Please try again later."
+)
+
+
+class MessageRole(Enum):
+    HUMAN = "user"
+    ASSISTANT = "assistant"
+    SYSTEM = "system"
+
+
+# Receives (event name, data) for progress and token events of a streamed run
+EventHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+# Workflow instances are shared, so the handler is scoped to the request's task
+_event_handler: ContextVar[Optional[EventHandler]] = ContextVar(
+    "workflow_event_handler", default=None
+)
+
+
+# Whether the current request may reuse cached intermediate results; the
+# `no_cache` opt-out covers these as well as the response cache
+_use_cache: ContextVar[bool] = ContextVar("workflow_use_cache", default=True)
+
+
+@contextmanager
+def caching(enabled: bool) -> Iterator[None]:
+    """
+    Allow or forbid cached intermediate results for the runs started in this
+    context.
+    """
+    token = _use_cache.set(enabled)
+    try:
+        yield
+    finally:
+        _use_cache.reset(token)
+
+
+@contextmanager
+def observe_llm_call(agent_type: str, model: str, call: str) -> Iterator[None]:
+    """
+    Record the latency and failure of an LLM call per agent and model.
+    """
+    labels = (agent_type, model, call)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        llm_call_errors.labels(*labels).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        llm_call_seconds.labels(*labels).observe(elapsed)
+        record(f"llm.{call}", elapsed)
+
+
+async def send_llm_request(
+    llm, model: str, request: Callable[[Any], Awaitable[Any]]
+) -> Any:
+    """
+    Await `request(llm)` within a slot of the model's concurrency limit,
+    retrying transient failures behind the model's circuit breaker.
+    """
+
+    async def attempt() -> Any:
+        async with llm_scheduler.slot(model):
+            return await request(llm)
+
+    return await resilient_caller.call(model, attempt)
+
+
+def _instrument_step(name: str, func: Callable) -> Callable:
+    """
+    Wrap a step so its latency and failures are recorded per agent and model.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self: "BaseWorkflow", *args, **kwargs):
+        labels = (self.agent_type, self.model, name)
+        start = time.perf_counter()
+        try:
+            return await func(self, *args, **kwargs)
+        except Exception:
+            workflow_step_errors.labels(*labels).inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            workflow_step_seconds.labels(*labels).observe(elapsed)
+            record(f"step.{name}", elapsed)
+
+    return wrapper
 
 
 # Create a custom metaclass that combines WorkflowMeta and ABCMeta
@@ -12,29 +139,263 @@ class WorkflowABCMeta(type(Workflow), ABCMeta):
 
 
 class BaseWorkflow(Workflow, ABC, metaclass=WorkflowABCMeta):
-    def __init__(self, timeout: int = 60, verbose: bool = True):
+    """
+    Base class for the chatbot workflows.
+
+    Instances are stateless with respect to conversations: the LLM is bound
+    once at construction time and all per-conversation state lives in the
+    memory passed to `execute_request_workflow`, so a single instance can be
+    shared between concurrent requests.
+
+    Every `@step` of a subclass and every LLM call made through the helpers
+    below is timed into the Prometheus metrics, labelled by `agent_type` and
+    model.
+
+    When `settings.llm_hedge_models` names a secondary model for the
+    workflow's model, LLM calls are hedged: if the primary has not answered
+    within the configured percentile of its recent latency, or fails, the
+    same call is sent to the secondary and the first answer wins.
+    """
+
+    # Agent type name used in metrics, matching the WorkflowFactory key
+    agent_type: str = "base"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, attr in list(vars(cls).items()):
+            # The step configuration survives the wrapper via functools.wraps
+            if callable(attr) and hasattr(attr, "__step_config"):
+                setattr(cls, name, _instrument_step(name, attr))
+
+    def __init__(
+        self, model: str = DEFAULT_MODEL, timeout: int = 60, verbose: bool = True
+    ):
         super().__init__(timeout=timeout, verbose=verbose)
         self.llm = None  # Initialize llm as None
+        self.hedge_llm = None
+        self.hedge_model = None
+        self.model = model
+        self.set_model(model)
 
     def set_model(self, model: str):
-        # Update the LLM based on the model name
-        if model == "llama-3.1-70b-versatile":
-            self.llm = Groq(model=model)
-        elif model == "gpt-4o":
-            self.llm = OpenAI(model=model)
-        elif model == "gpt-4o-mini":
-            self.llm = OpenAI(model=model)
-        elif model == "models/gemini-1.5-pro":
-            self.llm = Gemini(model=model)
-        elif model == "models/gemini-1.5-flash":
-            self.llm = Gemini(model=model)
+        # Clients are shared process-wide; unknown models fall back to Groq
+        self.llm = llm_registry.get(model)
+        secondary = settings.llm_hedge_models.get(model)
+        if secondary and resolve_model(secondary) != resolve_model(model):
+            self.hedge_llm = llm_registry.get(secondary)
+            self.hedge_model = secondary
         else:
-            # raise ValueError(f"Unsupported model: {model}")
-            self.llm = Groq(model="llama-3.1-70b-versatile")
+            self.hedge_llm = None
+            self.hedge_model = None
+
+    @staticmethod
+    def build_memory(
+        history: Optional[List[Dict[str, str]]] = None, token_limit: int = 1024
+    ) -> ChatMemoryBuffer:
+        """
+        Create a fresh memory buffer populated with the given history.
+        """
+        memory = ChatMemoryBuffer.from_defaults(token_limit=token_limit)
+        for message in history or []:
+            role = message.get("role", "").upper()
+            if role == "USER":
+                role = MessageRole.HUMAN
+            elif role == "ASSISTANT":
+                role = MessageRole.ASSISTANT
+            else:
+                role = MessageRole.SYSTEM
+            memory.put(ChatMessage(role=role, content=message.get("content", "")))
+        return memory
+
+    @staticmethod
+    def format_memory(memory: ChatMemoryBuffer) -> str:
+        """
+        Render the memory contents as a newline-joined chat history string.
+        """
+        return "\n".join([f"{msg.role.value}: {msg.content}" for msg in memory.get()])
+
+    def deadline(self):
+        """
+        Scope the LLM calls of one run, retries included, to the workflow
+        timeout.
+        """
+        return request_deadline(self._timeout)
+
+    @property
+    def use_cache(self) -> bool:
+        return _use_cache.get()
+
+    async def emit(self, event: str, **data: Any) -> None:
+        """
+        Send an event to the streaming client, if the request is streamed.
+        """
+        handler = _event_handler.get()
+        if handler is not None:
+            await handler(event, data)
+
+    def _observe_llm_call(self, call: str):
+        return observe_llm_call(self.agent_type, self.model, call)
+
+    async def _call_llm(
+        self,
+        call: str,
+        request: Callable[[Any], Awaitable[Any]],
+        discard: Optional[Callable[[Any], Awaitable[None]]] = None,
+    ) -> Any:
+        """
+        Await `request(llm)` on the workflow's LLM, hedged to the secondary
+        model when one is configured; `discard` releases the result of a
+        call that lost the race. Each attempt waits for a slot of its
+        model's concurrency limit (a stream holds it until its first chunk)
+        and transient failures are retried per model within the deadline.
+        """
+
+        def send(llm, model: str) -> Awaitable[Any]:
+            return send_llm_request(llm, model, request)
+
+        if self.hedge_llm is None:
+            return await send(self.llm, self.model)
+
+        key = (self.model, call)
+
+        async def primary() -> Any:
+            # The hedging delay derives from the primary's own latency, not
+            # from the hedged outcome it shortens
+            start = time.perf_counter()
+            try:
+                result = await send(self.llm, self.model)
+            except asyncio.CancelledError:
+                # Lost to the secondary: its latency is at least this long
+                latency_tracker.observe(key, time.perf_counter() - start)
+                raise
+            latency_tracker.observe(key, time.perf_counter() - start)
+            return result
+
+        result, winner, reason = await hedged(
+            primary,
+            lambda: send(self.hedge_llm, self.hedge_model),
+            latency_tracker.delay(key),
+            discard,
+        )
+        if reason is not None:
+            labels = (self.agent_type, self.model, call)
+            llm_hedge_requests.labels(*labels, reason).inc()
+            llm_hedge_wins.labels(*labels, winner).inc()
+        return result
+
+    async def acomplete(self, prompt: str) -> str:
+        """
+        Run a single completion and return the stripped text.
+        """
+        with self._observe_llm_call("complete"):
+            response = await self._call_llm(
+                "complete", lambda llm: llm.acomplete(prompt)
+            )
+        return str(response).strip()
+
+    async def astructured_predict(self, output_cls, prompt, **prompt_args):
+        """
+        Run a structured prediction returning an instance of `output_cls`.
+        """
+        with self._observe_llm_call("structured"):
+            return await self._call_llm(
+                "structured",
+                lambda llm: llm.astructured_predict(
+                    output_cls=output_cls, prompt=prompt, **prompt_args
+                ),
+            )
+
+    async def generate(self, prompt: str) -> str:
+        """
+        Produce the user-facing answer for `prompt`.
+
+        When the request is streamed, tokens are emitted as they arrive via the
+        llama_index streaming API; otherwise this is a plain completion.
+        """
+        if _event_handler.get() is None:
+            return await self.acomplete(prompt)
+
+        async def open_stream(llm):
+            # Hedging races on the first chunk; nothing has been emitted yet
+            stream = await llm.astream_complete(prompt)
+            first = await anext(stream, None)
+            return stream, [] if first is None else [first]
+
+        async def close_stream(opened) -> None:
+            # A stream opened by the call that lost the hedge race
+            await opened[0].aclose()
+
+        async def stream_chunks():
+            stream, head = await self._call_llm("stream", open_stream, close_stream)
+            for chunk in head:
+                yield chunk
+            async for chunk in stream:
+                yield chunk
+
+        chunks = []
+        start = time.perf_counter()
+        first_token_at = None
+        with self._observe_llm_call("stream"):
+            async for chunk in stream_chunks():
+                if chunk.delta:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        llm_time_to_first_token_seconds.labels(
+                            self.agent_type, self.model
+                        ).observe(first_token_at - start)
+                    chunks.append(chunk.delta)
+                    await self.emit("token", delta=chunk.delta)
+
+        # Chunks approximate tokens; rate is measured after the first one
+        elapsed = time.perf_counter() - (first_token_at or start)
+        if len(chunks) > 1 and elapsed > 0:
+            llm_tokens_per_second.labels(self.agent_type, self.model).observe(
+                (len(chunks) - 1) / elapsed
+            )
+        return "".join(chunks).strip()
+
+    async def stream_request_workflow(
+        self,
+        user_input: str,
+        history: List[Dict[str, str]] = None,
+        memory: Optional[ChatMemoryBuffer] = None,
+        use_cache: bool = True,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Run the workflow and yield its (event, data) pairs as they happen.
+
+        The last event is always `done` carrying the final response. Closing
+        the iterator early (e.g. the client went away) cancels the run.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def handler(event: str, data: Dict[str, Any]) -> None:
+            await queue.put((event, data))
+
+        # The task copies the current context, so set the handler around it
+        token = _event_handler.set(handler)
+        try:
+            with self.deadline(), caching(use_cache):
+                task = asyncio.create_task(
+                    self.execute_request_workflow(user_input, history, memory)
+                )
+        finally:
+            _event_handler.reset(token)
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+
+        try:
+            while (item := await queue.get()) is not None:
+                yield item
+            yield "done", {"response": task.result()}
+        finally:
+            if not task.done():
+                task.cancel()
 
     @abstractmethod
     async def execute_request_workflow(
-        self, user_input: str, history: list = None, model: str = ...
+        self,
+        user_input: str,
+        history: List[Dict[str, str]] = None,
+        memory: Optional[ChatMemoryBuffer] = None,
     ) -> str:
-        self.set_model(model)  # Set the model before executing the workflow
         pass
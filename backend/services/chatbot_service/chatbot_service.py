@@ -1,17 +1,106 @@
-from typing import Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from .workflow_factory import WorkflowFactory
+from ...core.config import settings
+from ...core.singleflight import SingleFlight
+from .base_workflow import FALLBACK_RESPONSE, BaseWorkflow, caching
+from .response_cache import ResponseCache, response_cache
+from .workflow_pool import WorkflowPool
 
 
 class ChatbotService:
-    def __init__(self):
-        self.workflow_factory = WorkflowFactory()
+    def __init__(self, pool_size: int = None, cache: ResponseCache = None):
+        self.workflow_pool = WorkflowPool(
+            max_size=pool_size or settings.workflow_pool_size
+        )
+        self.response_cache = cache or response_cache
+        self.inflight = SingleFlight("chat")
 
     async def process_request(
         self,
         user_input: str,
         workflow_type: str,
         history: List[Dict[str, str]] = None,
+        model: str = None,
+        use_cache: bool = True,
     ) -> str:
-        workflow = self.workflow_factory.create_workflow(workflow_type)
-        return await workflow.execute_request_workflow(user_input, history)
+        workflow = self.workflow_pool.acquire(workflow_type, model)
+
+        if not use_cache:
+            return await self._execute(workflow, user_input, history, use_cache=False)
+
+        key = self.response_cache.make_key(user_input, workflow_type, model, history)
+        cached = await self.response_cache.get(key)
+        if cached is not None:
+            return cached
+
+        async def execute_and_cache() -> str:
+            response = await self._execute(workflow, user_input, history)
+            if response != FALLBACK_RESPONSE:
+                await self.response_cache.set(key, response, workflow_type)
+            return response
+
+        # Identical concurrent requests share a single workflow run
+        return await self.inflight.do(key, execute_and_cache)
+
+    async def _execute(
+        self,
+        workflow: BaseWorkflow,
+        user_input: str,
+        history: List[Dict[str, str]] = None,
+        use_cache: bool = True,
+    ) -> str:
+        # Memory is built per request so concurrent users never share it
+        memory = workflow.build_memory(history)
+        with workflow.deadline(), caching(use_cache):
+            return await workflow.execute_request_workflow(user_input, memory=memory)
+
+    def stream_request(
+        self,
+        user_input: str,
+        workflow_type: str,
+        history: List[Dict[str, str]] = None,
+        model: str = None,
+        use_cache: bool = True,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream the (event, data) pairs of a request; the last one is `done`.
+
+        A cached response is sent as a single `done` event. Invalid agent types
+        are rejected here rather than once streaming has started.
+        """
+        workflow = self.workflow_pool.acquire(workflow_type, model)
+        key = None
+        if use_cache:
+            key = self.response_cache.make_key(
+                user_input, workflow_type, model, history
+            )
+        return self._stream(
+            workflow, user_input, workflow_type, history, key, use_cache
+        )
+
+    async def _stream(
+        self,
+        workflow: BaseWorkflow,
+        user_input: str,
+        workflow_type: str,
+        history: List[Dict[str, str]],
+        key: Optional[str],
+        use_cache: bool = True,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        if key is not None:
+            cached = await self.response_cache.get(key)
+            if cached is not None:
+                yield "done", {"response": cached, "cached": True}
+                return
+
+        memory = workflow.build_memory(history)
+        async for event, data in workflow.stream_request_workflow(
+            user_input, memory=memory, use_cache=use_cache
+        ):
+            if (
+                event == "done"
+                and key is not None
+                and data["response"] != FALLBACK_RESPONSE
+            ):
+                await self.response_cache.set(key, data["response"], workflow_type)
+            yield event, data
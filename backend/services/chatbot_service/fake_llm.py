@@ -0,0 +1,209 @@
+import asyncio
+import math
+import random
+import time
+import zlib
+from typing import Any, Dict, List, Optional, get_args, get_origin
+from urllib.parse import parse_qsl
+
+from llama_index.core.base.llms.types import (
+    CompletionResponse,
+    CompletionResponseAsyncGen,
+    CompletionResponseGen,
+    LLMMetadata,
+)
+from llama_index.core.llms import CustomLLM
+from llama_index.core.llms.callbacks import llm_completion_callback
+from pydantic import BaseModel, Field, PrivateAttr
+
+FAKE_PREFIX = "fake/"
+
+# Named latency/throughput/failure profiles selectable as `fake/<profile>`
+FAKE_PROFILES: Dict[str, Dict[str, float]] = {
+    "default": {"latency": 0.2, "latency_sigma": 0.25, "tokens_per_second": 200},
+    "instant": {"latency": 0.0, "latency_sigma": 0.0, "tokens_per_second": 0},
+    "fast": {"latency": 0.02, "latency_sigma": 0.1, "tokens_per_second": 1000},
+    "slow": {"latency": 1.0, "latency_sigma": 0.5, "tokens_per_second": 30},
+    "flaky": {
+        "latency": 0.2,
+        "latency_sigma": 0.25,
+        "tokens_per_second": 200,
+        "failure_rate": 0.1,
+        "rate_limit_rate": 0.05,
+    },
+}
+
+# Fields that may be overridden from the model name
+FAKE_OPTIONS = (
+    "latency",
+    "latency_sigma",
+    "tokens_per_second",
+    "response_tokens",
+    "failure_rate",
+    "rate_limit_rate",
+    "seed",
+)
+
+WORDS = (
+    "the model answers with a short deterministic paragraph about data "
+    "pipelines training evaluation deployment monitoring and feedback loops"
+).split()
+
+
+class FakeLLMError(Exception):
+    """
+    Injected provider failure. `status_code` mimics the HTTP status a real
+    provider would have answered with (500, or 429 for rate limiting).
+    """
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeLLM(CustomLLM):
+    """
+    Local LLM with deterministic answers and simulated provider behaviour.
+
+    Responses are derived from a hash of the prompt, so the same prompt
+    always gets the same answer. Time to first token is drawn from a
+    log-normal distribution with median `latency` and shape `latency_sigma`,
+    followed by `response_tokens` tokens at `tokens_per_second` (0 means all
+    at once). Each call fails with probability `failure_rate` (status 500) or
+    `rate_limit_rate` (status 429) after the first-token delay.
+    """
+
+    profile: str = "default"
+    latency: float = Field(default=0.2, ge=0)
+    latency_sigma: float = Field(default=0.25, ge=0)
+    tokens_per_second: float = Field(default=200.0, ge=0)
+    response_tokens: int = Field(default=48, ge=1)
+    failure_rate: float = Field(default=0.0, ge=0, le=1)
+    rate_limit_rate: float = Field(default=0.0, ge=0, le=1)
+    seed: Optional[int] = None
+
+    _random: random.Random = PrivateAttr()
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._random = random.Random(self.seed)
+
+    @classmethod
+    def from_model_name(cls, model: str) -> "FakeLLM":
+        """
+        Build a fake from `fake/<profile>[?option=value&...]`, where options
+        override the profile's fields.
+        """
+        name, _, query = model[len(FAKE_PREFIX) :].partition("?")
+        if name not in FAKE_PROFILES:
+            raise ValueError(f"Unknown fake LLM profile: {name}")
+        options = dict(parse_qsl(query))
+        unknown = set(options) - set(FAKE_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown fake LLM options: {sorted(unknown)}")
+        return cls(profile=name, **{**FAKE_PROFILES[name], **options})
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FakeLLM"
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(
+            num_output=self.response_tokens, model_name=FAKE_PREFIX + self.profile
+        )
+
+    def _tokens(self, prompt: str) -> List[str]:
+        rng = random.Random(zlib.crc32(prompt.encode("utf-8")))
+        return [rng.choice(WORDS) + " " for _ in range(self.response_tokens)]
+
+    def _first_token_delay(self) -> float:
+        if self.latency <= 0:
+            return 0.0
+        return self._random.lognormvariate(math.log(self.latency), self.latency_sigma)
+
+    def _token_delay(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def _maybe_fail(self) -> None:
+        draw = self._random.random()
+        if draw < self.rate_limit_rate:
+            raise FakeLLMError("Injected rate limit", status_code=429)
+        if draw < self.rate_limit_rate + self.failure_rate:
+            raise FakeLLMError("Injected provider failure")
+
+    @llm_completion_callback()
+    def complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        time.sleep(self._first_token_delay())
+        self._maybe_fail()
+        tokens = self._tokens(prompt)
+        time.sleep(self._token_delay() * len(tokens))
+        return CompletionResponse(text="".join(tokens))
+
+    @llm_completion_callback()
+    def stream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponseGen:
+        def gen() -> CompletionResponseGen:
+            time.sleep(self._first_token_delay())
+            self._maybe_fail()
+            text = ""
+            for token in self._tokens(prompt):
+                text += token
+                yield CompletionResponse(text=text, delta=token)
+                time.sleep(self._token_delay())
+
+        return gen()
+
+    @llm_completion_callback()
+    async def acomplete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        await asyncio.sleep(self._first_token_delay())
+        self._maybe_fail()
+        tokens = self._tokens(prompt)
+        await asyncio.sleep(self._token_delay() * len(tokens))
+        return CompletionResponse(text="".join(tokens))
+
+    @llm_completion_callback()
+    async def astream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponseAsyncGen:
+        async def gen() -> CompletionResponseAsyncGen:
+            await asyncio.sleep(self._first_token_delay())
+            self._maybe_fail()
+            text = ""
+            for token in self._tokens(prompt):
+                text += token
+                yield CompletionResponse(text=text, delta=token)
+                await asyncio.sleep(self._token_delay())
+
+        return gen()
+
+    async def astructured_predict(self, output_cls, prompt, **prompt_args):
+        await asyncio.sleep(self._first_token_delay())
+        self._maybe_fail()
+        text = prompt.format(**prompt_args)
+        return fake_structured(output_cls, random.Random(zlib.crc32(text.encode())))
+
+
+def fake_structured(output_cls: type, rng: random.Random) -> BaseModel:
+    """
+    Build an instance of a pydantic model with plausible values for its
+    str, bool and List[str] fields (which covers the workflows' outputs).
+    """
+    values = {}
+    for name, field in output_cls.model_fields.items():
+        annotation = field.annotation
+        if annotation is bool:
+            values[name] = rng.random() < 0.5
+        elif get_origin(annotation) in (list, List) and get_args(annotation) == (str,):
+            values[name] = [
+                f"{name} {index}: " + " ".join(rng.sample(WORDS, 6))
+                for index in range(1, 4)
+            ]
+        else:
+            values[name] = " ".join(rng.sample(WORDS, 8))
+    return output_cls(**values)
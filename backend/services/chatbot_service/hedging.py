@@ -0,0 +1,113 @@
+import asyncio
+import functools
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+from ...core.config import settings
+
+
+class LatencyTracker:
+    """
+    Rolling window of recent call latencies per key, used to derive the
+    hedging delay from a latency percentile.
+    """
+
+    def __init__(
+        self,
+        window: int = 256,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+        initial_delay: float = 2.0,
+        min_delay: float = 0.25,
+    ):
+        self.window = window
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self._samples: Dict[Hashable, Deque[float]] = {}
+
+    def observe(self, key: Hashable, seconds: float) -> None:
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def delay(self, key: Hashable) -> float:
+        """
+        Return how long to wait for the primary before hedging.
+
+        Until `min_samples` latencies have been seen, `initial_delay` is used.
+        """
+        samples = self._samples.get(key)
+        if samples is None or len(samples) < self.min_samples:
+            return self.initial_delay
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, round(self.percentile / 100 * (len(ordered) - 1)))
+        return max(self.min_delay, ordered[index])
+
+
+def _dispose(task: asyncio.Future, discard) -> None:
+    """
+    Done callback for a call that lost the race: retrieve its error, or hand
+    a result that nobody will use to `discard`.
+    """
+    if task.cancelled() or task.exception() is not None:
+        return
+    if discard is not None:
+        asyncio.ensure_future(discard(task.result()))
+
+
+async def hedged(
+    primary: Callable[[], Awaitable[Any]],
+    secondary: Callable[[], Awaitable[Any]],
+    delay: float,
+    discard: Optional[Callable[[Any], Awaitable[None]]] = None,
+) -> Tuple[Any, str, Optional[str]]:
+    """
+    Run `primary`, and also `secondary` if the primary has not finished within
+    `delay` seconds ("slow") or has failed ("error"). The first successful
+    result wins and the other call is cancelled; if it completed anyway, its
+    result is passed to `discard` (e.g. to close an opened stream).
+
+    Returns (result, winner, reason), where winner is "primary" or
+    "secondary" and reason is None when no hedge was sent. If both calls
+    fail, the primary's error is raised.
+    """
+    primary_task = asyncio.ensure_future(primary())
+    tasks = {primary_task: "primary"}
+    winner: Optional[asyncio.Future] = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done and primary_task.exception() is None:
+            winner = primary_task
+            return primary_task.result(), "primary", None
+
+        reason = "error" if done else "slow"
+        tasks[asyncio.ensure_future(secondary())] = "secondary"
+        pending = {task for task in tasks if not task.done()}
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            # Prefer the primary when both finished in the same round
+            for task in sorted(done, key=lambda task: tasks[task] != "primary"):
+                if task.exception() is None:
+                    winner = task
+                    return task.result(), tasks[task], reason
+        raise primary_task.exception()
+    finally:
+        for task in tasks:
+            if task is not winner:
+                task.cancel()
+                task.add_done_callback(functools.partial(_dispose, discard=discard))
+
+
+# Shared by all workflows, keyed by (model, call kind)
+latency_tracker = LatencyTracker(
+    window=settings.llm_hedge_window,
+    percentile=settings.llm_hedge_percentile,
+    min_samples=settings.llm_hedge_min_samples,
+    initial_delay=settings.llm_hedge_initial_delay,
+    min_delay=settings.llm_hedge_min_delay,
+)
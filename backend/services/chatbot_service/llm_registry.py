@@ -0,0 +1,146 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import httpx
+from llama_index.core.llms import LLM
+from llama_index.llms.gemini import Gemini
+from llama_index.llms.groq import Groq
+from llama_index.llms.openai import OpenAI
+
+from ... import logger
+from ...core.config import settings
+from .fake_llm import FAKE_PREFIX, FakeLLM
+
+DEFAULT_MODEL = "llama-3.1-70b-versatile"
+
+# Supported model names and the provider serving them
+MODEL_PROVIDERS = {
+    "llama-3.1-70b-versatile": "groq",
+    "gpt-4o": "openai",
+    "gpt-4o-mini": "openai",
+    "models/gemini-1.5-pro": "gemini",
+    "models/gemini-1.5-flash": "gemini",
+}
+
+# Providers whose llama_index client accepts a shared httpx.AsyncClient
+HTTP_PROVIDERS = {"groq", "openai"}
+
+
+def resolve_model(model: Optional[str]) -> Tuple[str, str]:
+    """
+    Map a model name to its (provider, model) pair.
+
+    `fake/<profile>` selects the local fake provider when it is enabled.
+    Unknown models fall back to the default Groq model.
+    """
+    if model in MODEL_PROVIDERS:
+        return MODEL_PROVIDERS[model], model
+    if settings.llm_fake_enabled and model and model.startswith(FAKE_PREFIX):
+        return "fake", model
+    return MODEL_PROVIDERS[DEFAULT_MODEL], DEFAULT_MODEL
+
+
+class LLMRegistry:
+    """
+    Process-wide registry of LLM clients keyed by (provider, model, options).
+
+    Each client is created once and reused for every request. Groq and OpenAI
+    clients share one pooled `httpx.AsyncClient` per provider so keep-alive
+    connections (and their TLS sessions) survive between chats.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 60.0,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self._clients: Dict[Tuple[str, str, Tuple], LLM] = {}
+        self._http_clients: Dict[str, httpx.AsyncClient] = {}
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def _http_client(self, provider: str) -> httpx.AsyncClient:
+        client = self._http_clients.get(provider)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self._http_clients[provider] = client
+        return client
+
+    def _create(self, provider: str, model: str, **options: Any) -> LLM:
+        if provider == "groq":
+            return Groq(
+                model=model,
+                timeout=self.timeout,
+                async_http_client=self._http_client(provider),
+                **options,
+            )
+        if provider == "openai":
+            return OpenAI(
+                model=model,
+                timeout=self.timeout,
+                async_http_client=self._http_client(provider),
+                **options,
+            )
+        if provider == "gemini":
+            return Gemini(model=model, **options)
+        if provider == "fake":
+            return FakeLLM.from_model_name(model)
+        raise ValueError(f"Unsupported provider: {provider}")
+
+    def get(self, model: Optional[str] = None, **options: Any) -> LLM:
+        """
+        Return the shared client for `model`, creating it on first use.
+        """
+        provider, model = resolve_model(model)
+        key = (provider, model, tuple(sorted(options.items())))
+        llm = self._clients.get(key)
+        if llm is None:
+            llm = self._create(provider, model, **options)
+            self._clients[key] = llm
+            logger.debug(f"Created {provider} client for {model}")
+        return llm
+
+    async def warm_up(self, models: Iterable[str]) -> None:
+        """
+        Create clients for `models` and open a connection to each HTTP provider
+        so the first chat does not pay connection and TLS setup.
+        """
+        for model in models:
+            try:
+                llm = self.get(model)
+            except Exception as e:
+                logger.warning(f"Could not create LLM client for {model}: {e}")
+                continue
+
+            provider, _ = resolve_model(model)
+            if provider not in HTTP_PROVIDERS:
+                continue
+            try:
+                await self._http_client(provider).head(llm.api_base)
+            except httpx.HTTPError as e:
+                logger.warning(f"Could not warm up {provider} connection: {e}")
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled HTTP clients and forget all LLM clients.
+        """
+        for client in self._http_clients.values():
+            await client.aclose()
+        self._http_clients.clear()
+        self._clients.clear()
+
+
+llm_registry = LLMRegistry(
+    max_connections=settings.llm_max_connections,
+    max_keepalive_connections=settings.llm_max_keepalive_connections,
+    keepalive_expiry=settings.llm_keepalive_expiry,
+    timeout=settings.llm_timeout,
+)
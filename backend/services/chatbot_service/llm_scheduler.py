@@ -0,0 +1,189 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+
+from ...core.config import settings
+from ...core.metrics import (
+    llm_concurrency_limit,
+    llm_in_flight,
+    llm_queue_wait_seconds,
+)
+from ...core.timing import record
+from .llm_registry import resolve_model
+from .resilience import status_code_of
+
+# User on whose behalf the current request calls LLMs, for fair queueing.
+# Tasks spawned by the request (streams, subtasks) inherit it.
+llm_user: ContextVar[Optional[str]] = ContextVar("llm_user", default=None)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """
+    Whether a provider error means "too many requests" (HTTP 429).
+    """
+    return status_code_of(error) == 429
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit for one provider and model, adjusted by AIMD.
+
+    Each successful call made while the limit was saturated raises it by
+    `increase / limit` (about `increase` per round trip). A 429, or a call
+    slower than `latency_tolerance` times the average latency, multiplies it
+    by `backoff`, at most once per average latency so a burst of failures
+    from one overloaded window counts once.
+
+    Callers over the limit wait in a queue per user, and freed slots go to
+    the users in turn, so one user's burst cannot starve the others.
+    """
+
+    def __init__(
+        self,
+        initial: float = 16,
+        min_limit: float = 1,
+        max_limit: float = 256,
+        increase: float = 1.0,
+        backoff: float = 0.5,
+        latency_tolerance: float = 3.0,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.timer = timer
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self._backed_off_at = float("-inf")
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    @property
+    def capacity(self) -> int:
+        return max(1, int(self.limit))
+
+    async def acquire(self, user: str) -> None:
+        if self.in_flight < self.capacity and not self._waiters:
+            self.in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted a slot but cancelled before using it
+                self.in_flight -= 1
+                self._dispatch()
+            else:
+                waiters = self._waiters[user]
+                waiters.remove(future)
+                if not waiters:
+                    del self._waiters[user]
+            raise
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False):
+        """
+        Free a slot. `latency` is given for successful calls and `overloaded`
+        for calls the provider rejected with 429; other failures leave the
+        limit unchanged.
+        """
+        saturated = self.in_flight >= self.capacity
+        self.in_flight -= 1
+        if overloaded:
+            self._back_off()
+        elif latency is not None:
+            slow = (
+                self.latency is not None
+                and latency > self.latency * self.latency_tolerance
+            )
+            self.latency = (
+                latency if self.latency is None else 0.9 * self.latency + 0.1 * latency
+            )
+            if slow:
+                self._back_off()
+            elif saturated:
+                self.limit = min(
+                    self.max_limit, self.limit + self.increase / self.limit
+                )
+        self._dispatch()
+
+    def _back_off(self) -> None:
+        now = self.timer()
+        if now - self._backed_off_at < (self.latency or 0.0):
+            return
+        self._backed_off_at = now
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+
+    def _dispatch(self) -> None:
+        while self._waiters and self.in_flight < self.capacity:
+            user, waiters = next(iter(self._waiters.items()))
+            future = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(user)
+            else:
+                del self._waiters[user]
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+
+class LLMScheduler:
+    """
+    Process-wide gate for outbound LLM calls, with one `AdaptiveLimit` per
+    (provider, model). Time spent waiting for a slot is exported as
+    `llm_queue_wait_seconds` and reported in the request timings.
+    """
+
+    def __init__(self, **limit_options):
+        self.limit_options = limit_options
+        self._limits: Dict[Tuple[str, str], AdaptiveLimit] = {}
+
+    def limit_for(self, model: Optional[str]) -> AdaptiveLimit:
+        key = resolve_model(model)
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = self._limits[key] = AdaptiveLimit(**self.limit_options)
+        return limit
+
+    @asynccontextmanager
+    async def slot(self, model: Optional[str]) -> AsyncIterator[None]:
+        """
+        Hold a concurrency slot for `model` around one provider call.
+        """
+        labels = resolve_model(model)
+        limit = self.limit_for(model)
+        start = time.perf_counter()
+        await limit.acquire(llm_user.get() or "anonymous")
+        waited = time.perf_counter() - start
+        llm_queue_wait_seconds.labels(*labels).observe(waited)
+        record("llm_queue", waited)
+        llm_in_flight.labels(*labels).set(limit.in_flight)
+
+        start = time.perf_counter()
+        latency, overloaded = None, False
+        try:
+            yield
+            latency = time.perf_counter() - start
+        except Exception as e:
+            overloaded = is_rate_limited(e)
+            raise
+        finally:
+            limit.release(latency=latency, overloaded=overloaded)
+            llm_in_flight.labels(*labels).set(limit.in_flight)
+            llm_concurrency_limit.labels(*labels).set(limit.limit)
+
+
+llm_scheduler = LLMScheduler(
+    initial=settings.llm_concurrency_initial,
+    min_limit=settings.llm_concurrency_min,
+    max_limit=settings.llm_concurrency_max,
+    backoff=settings.llm_concurrency_backoff,
+    latency_tolerance=settings.llm_concurrency_latency_tolerance,
+)
@@ -1,27 +1,22 @@
 import asyncio
-from enum import Enum
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from llama_index.core.llms import ChatMessage
 from llama_index.core.memory import ChatMemoryBuffer
 from llama_index.core.prompts import PromptTemplate
 from llama_index.core.workflow import Event, step
-from llama_index.llms.groq import Groq
 from pydantic import BaseModel, Field
 
 from ... import logger
-from .base_workflow import BaseWorkflow
-
-
-class MessageRole(Enum):
-    HUMAN = "user"
-    ASSISTANT = "assistant"
-    SYSTEM = "system"
+from ...core.config import settings
+from .base_workflow import FALLBACK_RESPONSE, BaseWorkflow, MessageRole
+from .subtask_cache import SubtaskCache, subtask_cache
 
 
 class Subtask(BaseModel):
     description: str
     result: str = ""
+    cached: bool = False
 
 
 class AgentRequest(BaseModel):
@@ -42,6 +37,13 @@ class SubtasksOut(BaseModel):
 
 
 class MultiStepAgentWorkflow(BaseWorkflow):
+    agent_type = "multi_step"
+
+    # Memo of decompositions and subtask results shared by all instances
+    subtask_cache: Optional[SubtaskCache] = (
+        subtask_cache if settings.subtask_cache_enabled else None
+    )
+
     # Prompt templates
     decomposition_prompt_template = PromptTemplate(
         "Break down the following user request into a maximum of 3 clear, actionable, and self-contained subtasks. "
@@ -69,41 +71,84 @@ class MultiStepAgentWorkflow(BaseWorkflow):
         "Maintain the original meaning and information while enhancing the overall quality of the writing:\n{draft_response}"
     )
 
-    def __init__(self, timeout: int = 60, verbose: bool = True):
-        super().__init__(timeout=timeout, verbose=verbose)
-        self.memory = ChatMemoryBuffer.from_defaults(token_limit=1024)
-
     @step
     async def decompose_task(self, event: Event) -> Event:
         request = event.payload
-        response = await self.llm.astructured_predict(
-            output_cls=SubtasksOut,
-            prompt=self.decomposition_prompt_template,
-            user_input=request.user_input,
-        )
-        subtasks = [
-            Subtask(description=task.strip())
-            for task in response.subtasks
-            if task.strip()
-        ]
+
+        async def decompose() -> List[str]:
+            response = await self.astructured_predict(
+                SubtasksOut,
+                self.decomposition_prompt_template,
+                user_input=request.user_input,
+            )
+            return [task.strip() for task in response.subtasks if task.strip()]
+
+        cached = False
+        if self.subtask_cache is None or not self.use_cache:
+            descriptions = await decompose()
+        else:
+            descriptions, cached = await self.subtask_cache.decomposition(
+                request.user_input, self.model, decompose
+            )
+        subtasks = [Subtask(description=description) for description in descriptions]
         request.subtasks = subtasks
+        await self.emit(
+            "progress",
+            step="decomposition",
+            subtasks=[subtask.description for subtask in subtasks],
+            cached=cached,
+        )
         return Event(payload=request)
 
     @step
     async def execute_subtasks(self, event: Event) -> Event:
         request = event.payload
 
-        async def execute_single_subtask(subtask: Subtask):
-            response = await self.llm.acomplete(
-                self.execution_prompt_template.format(
-                    subtask_description=subtask.description
+        async def execute_single_subtask(index: int, subtask: Subtask):
+            async def execute() -> str:
+                return await self.acomplete(
+                    self.execution_prompt_template.format(
+                        subtask_description=subtask.description
+                    )
+                )
+
+            if self.subtask_cache is None or not self.use_cache:
+                subtask.result = await execute()
+            else:
+                subtask.result, subtask.cached = await self.subtask_cache.result(
+                    subtask.description, self.model, execute
                 )
+            await self.emit(
+                "progress",
+                step="subtask",
+                index=index,
+                total=len(request.subtasks),
+                description=subtask.description,
+                result=subtask.result,
+                cached=subtask.cached,
             )
-            subtask.result = str(response).strip()
 
-        await asyncio.gather(
-            *(execute_single_subtask(subtask) for subtask in request.subtasks)
+        # LLM calls are retried individually; a subtask that still fails is
+        # left out of the combination rather than failing the whole run
+        results = await asyncio.gather(
+            *(
+                execute_single_subtask(index, subtask)
+                for index, subtask in enumerate(request.subtasks)
+            ),
+            return_exceptions=True,
         )
+        completed = []
+        for subtask, result in zip(request.subtasks, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Subtask failed: {subtask.description}: {result}")
+            else:
+                completed.append(subtask)
+        if results and not completed:
+            raise results[0]
+        request.subtasks = completed
+        cached = sum(subtask.cached for subtask in completed)
+        if cached:
+            logger.info(f"Served {cached}/{len(completed)} subtasks from cache")
         return Event(payload=request)
 
     @step
@@ -112,55 +157,43 @@ async def combine_results(self, event: Event) -> Event:
         subtask_results = {
             subtask.description: subtask.result for subtask in request.subtasks
         }
-        response = await self.llm.acomplete(
+        response = await self.acomplete(
             self.combination_prompt_template.format(subtask_results=subtask_results)
         )
+        await self.emit("progress", step="combination")
         return Event(
             payload=AgentResponse(
-                final_response=str(response).strip(), subtask_results=subtask_results
+                final_response=response, subtask_results=subtask_results
             )
         )
 
     @step
     async def generate_final_response(self, event: Event) -> Event:
         response = event.payload
-        final_response = await self.llm.acomplete(
+        await self.emit("progress", step="refining")
+        response.final_response = await self.generate(
             self.final_response_prompt_template.format(
                 draft_response=response.final_response
             )
         )
-        response.final_response = str(final_response).strip()
         return Event(payload=response)
 
     async def execute_request_workflow(
         self,
         user_input: str,
         history: List[Dict[str, str]] = None,
-        model: str = "llama-3.1-70b-versatile"
+        memory: Optional[ChatMemoryBuffer] = None,
     ) -> str:
-        self.set_model(model)  # Set the model before executing the workflow
         try:
-            # Convert history to ChatMessage objects and add to memory
-            if history:
-                for message in history:
-                    role = message.get("role", "").upper()
-                    if role == "USER":
-                        role = MessageRole.HUMAN
-                    elif role == "ASSISTANT":
-                        role = MessageRole.ASSISTANT
-                    else:
-                        role = MessageRole.SYSTEM
-                    self.memory.put(
-                        ChatMessage(role=role, content=message.get("content", ""))
-                    )
+            # Per-conversation memory is owned by the caller, not the instance
+            if memory is None:
+                memory = self.build_memory(history)
 
             # Add the current user input to memory
-            self.memory.put(ChatMessage(role=MessageRole.HUMAN, content=user_input))
+            memory.put(ChatMessage(role=MessageRole.HUMAN, content=user_input))
 
             # Get the chat history as a string
-            chat_history = "\n".join(
-                [f"{msg.role.value}: {msg.content}" for msg in self.memory.get()]
-            )
+            chat_history = self.format_memory(memory)
 
             logger.info(f"Chat History: {chat_history}")
 
@@ -189,7 +222,7 @@ async def execute_request_workflow(
             response = event.payload
 
             # Add the final response to memory
-            self.memory.put(
+            memory.put(
                 ChatMessage(role=MessageRole.ASSISTANT, content=response.final_response)
             )
 
@@ -197,7 +230,7 @@ async def execute_request_workflow(
 
         except Exception as e:
             logger.error(f"Error processing request: {str(e)}")
-            return "I apologize, but I encountered an error while processing your request. Please try again later."
+            return FALLBACK_RESPONSE
 
 
 async def main():
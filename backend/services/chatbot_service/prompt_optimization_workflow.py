@@ -1,22 +1,14 @@
 import asyncio
-from enum import Enum
 from typing import Dict, List, Optional
 
 from llama_index.core.llms import ChatMessage
 from llama_index.core.memory import ChatMemoryBuffer
 from llama_index.core.prompts import PromptTemplate
 from llama_index.core.workflow import Event, StartEvent, StopEvent, step
-from llama_index.llms.groq import Groq
 from pydantic import BaseModel
 
 from ... import logger
-from .base_workflow import BaseWorkflow
-
-
-class MessageRole(Enum):
-    HUMAN = "user"
-    ASSISTANT = "assistant"
-    SYSTEM = "system"
+from .base_workflow import FALLBACK_RESPONSE, BaseWorkflow, MessageRole
 
 
 class OptimizePromptEvent(Event):
@@ -36,6 +28,8 @@ class OptimizePromptOutput(BaseModel):
 
 
 class PromptOptimizationWorkflow(BaseWorkflow):
+    agent_type = "prompt_optim"
+
     # Prompt templates
     evaluation_prompt_template = PromptTemplate(
         "Evaluate the following user prompt to determine if optimization is needed, "
@@ -48,24 +42,23 @@ class PromptOptimizationWorkflow(BaseWorkflow):
         "Original Prompt: {original_prompt}\nConversation History: {history}"
     )
 
-    def __init__(self, timeout: int = 60, verbose: bool = True):
-        super().__init__(timeout=timeout, verbose=verbose)
-        self.memory = ChatMemoryBuffer.from_defaults(token_limit=1024)
-
     @step
     async def evaluate_prompt(
         self, event: StartEvent
     ) -> GenerateResponseEvent | OptimizePromptEvent:
         # Evaluate the user prompt
-        evaluation_response = await self.llm.astructured_predict(
-            output_cls=EvaluatePromptOutput,
-            prompt=self.evaluation_prompt_template,
+        evaluation_response = await self.astructured_predict(
+            EvaluatePromptOutput,
+            self.evaluation_prompt_template,
             user_prompt=event.user_prompt,
             history=event.get("history", ""),
         )
         needs_optimization = evaluation_response.needs_optimization
 
         logger.info(f"Is optimization needed: {needs_optimization}")
+        await self.emit(
+            "progress", step="evaluation", needs_optimization=needs_optimization
+        )
 
         if needs_optimization:
             return OptimizePromptEvent(optimized_prompt=event.user_prompt)
@@ -77,15 +70,18 @@ async def optimize_prompt(
         self, event: OptimizePromptEvent
     ) -> GenerateResponseEvent:
         # Optimize the user prompt
-        optimization_response = await self.llm.astructured_predict(
-            output_cls=OptimizePromptOutput,
-            prompt=self.optimization_prompt_template,
+        optimization_response = await self.astructured_predict(
+            OptimizePromptOutput,
+            self.optimization_prompt_template,
             original_prompt=event.optimized_prompt,
             history=event.get("history", ""),
         )
         optimized_prompt = optimization_response.optimized_prompt
 
         logger.info(f"Optimized Prompt: {optimized_prompt}")
+        await self.emit(
+            "progress", step="optimization", optimized_prompt=optimized_prompt
+        )
 
         return GenerateResponseEvent(final_prompt=optimized_prompt)
 
@@ -93,36 +89,26 @@ async def optimize_prompt(
     async def generate_response(self, event: GenerateResponseEvent) -> StopEvent:
         # Generate the chatbot's response
         response_prompt = f"Chatbot response to: {event.final_prompt}"
-        chatbot_response = await self.llm.acomplete(response_prompt)
-        return StopEvent(result=str(chatbot_response).strip())
+        chatbot_response = await self.generate(response_prompt)
+        return StopEvent(result=chatbot_response)
 
     async def execute_request_workflow(
-        self, user_input: str, history: List[Dict[str, str]] = None, model: str = ...
+        self,
+        user_input: str,
+        history: List[Dict[str, str]] = None,
+        memory: Optional[ChatMemoryBuffer] = None,
     ) -> str:
-        logger.info(f"Model: {model}")
-        self.set_model(model)  # Set the model before executing the workflow
+        logger.info(f"Model: {self.model}")
         try:
-            # Convert history to ChatMessage objects and add to memory
-            if history:
-                for message in history:
-                    role = message.get("role", "").upper()
-                    if role == "USER":
-                        role = MessageRole.HUMAN
-                    elif role == "ASSISTANT":
-                        role = MessageRole.ASSISTANT
-                    else:
-                        role = MessageRole.SYSTEM
-                    self.memory.put(
-                        ChatMessage(role=role, content=message.get("content", ""))
-                    )
+            # Per-conversation memory is owned by the caller, not the instance
+            if memory is None:
+                memory = self.build_memory(history)
 
             # Add the current user input to memory
-            self.memory.put(ChatMessage(role=MessageRole.HUMAN, content=user_input))
+            memory.put(ChatMessage(role=MessageRole.HUMAN, content=user_input))
 
             # Get the chat history as a string
-            chat_history = "\n".join(
-                [f"{msg.role.value}: {msg.content}" for msg in self.memory.get()]
-            )
+            chat_history = self.format_memory(memory)
 
             logger.info(f"Chat History: {chat_history}")
 
@@ -139,15 +125,13 @@ async def execute_request_workflow(
             final_response = response_event.result
 
             # Add the final response to memory
-            self.memory.put(
-                ChatMessage(role=MessageRole.ASSISTANT, content=final_response)
-            )
+            memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=final_response))
 
             return final_response
 
         except Exception as e:
             logger.error(f"Error processing request: {str(e)}")
-            return "I apologize, but I encountered an error while processing your request. Please try again later."
+            return FALLBACK_RESPONSE
 
 
 async def main():
@@ -0,0 +1,258 @@
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+import httpx
+
+from ... import logger
+from ...core.config import settings
+from ...core.metrics import llm_circuit_rejections, llm_circuit_state, llm_retries
+from .llm_registry import resolve_model
+
+# Monotonic time by which the current request must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+# Error classes worth another attempt; client errors would fail again
+RETRYABLE = {"rate_limited", "timeout", "connection", "server"}
+# Error classes that say the provider itself is unhealthy
+PROVIDER_FAILURES = {"timeout", "connection", "server"}
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a provider whose circuit breaker is open.
+    """
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"Circuit open for {model}, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """
+    The request deadline passed before an LLM call could complete.
+    """
+
+
+def status_code_of(error: BaseException) -> Optional[int]:
+    """
+    HTTP status of a provider error, as exposed by the various SDKs.
+    """
+    for code in (
+        getattr(error, "status_code", None),
+        getattr(error, "code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+    ):
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def classify(error: BaseException) -> str:
+    """
+    Sort a failed LLM call into rate_limited, timeout, connection, server,
+    client or other.
+    """
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException)):
+        return "timeout"
+    if isinstance(error, (httpx.TransportError, ConnectionError)):
+        return "connection"
+    status = status_code_of(error)
+    if status == 429:
+        return "rate_limited"
+    if status is not None and status >= 500:
+        return "server"
+    if status is not None and status >= 400:
+        return "client"
+    return "other"
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound the LLM calls (retries included) made in this context to `seconds`
+    from now. A nested scope never extends an outer deadline.
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left until the request deadline, or None without one.
+    """
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class CircuitBreaker:
+    """
+    Closed while calls succeed. After `failure_threshold` consecutive
+    failures it opens and rejects calls for `reset_timeout` seconds, then
+    turns half-open and lets a single probe through: success closes it,
+    failure opens it again.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(
+        self,
+        name: str = "",
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.timer = timer
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def before_call(self) -> None:
+        """
+        Raise `CircuitOpenError` unless a call may go through now.
+        """
+        if self.state == self.OPEN:
+            waited = self.timer() - self._opened_at
+            if waited < self.reset_timeout:
+                raise CircuitOpenError(self.name, self.reset_timeout - waited)
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                raise CircuitOpenError(self.name, self.reset_timeout)
+            self._probing = True
+
+    def on_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def on_failure(self) -> None:
+        self._probing = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit breaker for {self.name} opened")
+            self.state = self.OPEN
+            self._opened_at = self.timer()
+
+    def on_abandoned(self) -> None:
+        # A cancelled or rejected probe says nothing about the provider
+        self._probing = False
+
+
+class ResilientCaller:
+    """
+    Runs LLM calls with classified retries and one circuit breaker per
+    (provider, model).
+
+    Retryable failures (rate limits, timeouts, connection and 5xx errors)
+    are retried up to `max_attempts` times with full-jitter exponential
+    backoff, as long as the wait fits within the request deadline; each
+    attempt is also cut off at the deadline, which raises `DeadlineExceeded`.
+    Only the provider's own timeouts, connection and 5xx errors count
+    towards the breaker; rate limits are left to the concurrency limiter,
+    which backs off on them.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def breaker_for(self, model: Optional[str]) -> CircuitBreaker:
+        key = resolve_model(model)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(
+                "/".join(key), self.failure_threshold, self.reset_timeout
+            )
+        return breaker
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def call(
+        self, model: Optional[str], attempt: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        labels = resolve_model(model)
+        breaker = self.breaker_for(model)
+        for number in range(1, self.max_attempts + 1):
+            left = remaining()
+            if left is not None and left <= 0:
+                raise DeadlineExceeded("Request deadline exceeded")
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                llm_circuit_rejections.labels(*labels).inc()
+                raise
+            cutoff = asyncio.timeout(left)
+            try:
+                async with cutoff:
+                    result = await attempt()
+            except Exception as e:
+                if cutoff.expired():
+                    # The request ran out of time, possibly while still queued
+                    # for a concurrency slot: no verdict on the provider
+                    breaker.on_abandoned()
+                    llm_circuit_state.labels(*labels).state(breaker.state)
+                    raise DeadlineExceeded("Request deadline exceeded") from e
+                kind = classify(e)
+                if kind in PROVIDER_FAILURES:
+                    breaker.on_failure()
+                else:
+                    breaker.on_abandoned()
+                llm_circuit_state.labels(*labels).state(breaker.state)
+                delay = self.backoff(number)
+                left = remaining()
+                if (
+                    kind not in RETRYABLE
+                    or number == self.max_attempts
+                    or (left is not None and delay >= left)
+                ):
+                    raise
+                llm_retries.labels(*labels, kind).inc()
+                logger.warning(f"Retrying {'/'.join(labels)} after {kind}: {e}")
+                await asyncio.sleep(delay)
+            except BaseException:
+                breaker.on_abandoned()
+                raise
+            else:
+                breaker.on_success()
+                llm_circuit_state.labels(*labels).state(breaker.state)
+                return result
+
+
+resilient_caller = ResilientCaller(
+    max_attempts=settings.llm_retry_attempts,
+    backoff_base=settings.llm_retry_backoff_base,
+    backoff_max=settings.llm_retry_backoff_max,
+    failure_threshold=settings.llm_circuit_failure_threshold,
+    reset_timeout=settings.llm_circuit_reset_timeout,
+)
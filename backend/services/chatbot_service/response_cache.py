@@ -0,0 +1,145 @@
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from ... import logger
+from ...core.cache import TTLCache
+from ...core.config import settings
+from ...core.metrics import response_cache_requests
+from .llm_registry import resolve_model
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt so trivially different spellings share a cache entry.
+    """
+    return " ".join(prompt.split()).casefold()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for chat completions.
+
+    A small in-process LRU sits in front of an optional Redis backend shared by
+    all workers. Entries are keyed on the normalized prompt, the whole
+    history (conversation summary included), the agent type and the model,
+    and expire after a per-agent TTL. Entries are shared between users, so
+    the key covers everything the workflow may see in its prompt. When Redis
+    is unreachable the cache keeps serving from the local tier and retries
+    Redis after `redis_retry_after` seconds.
+    """
+
+    def __init__(
+        self,
+        local_size: int = 1024,
+        local_ttl: float = 300.0,
+        ttls: Optional[Dict[str, int]] = None,
+        default_ttl: int = 3600,
+        redis_url: Optional[str] = None,
+        prefix: str = "chat:response:",
+        redis_retry_after: float = 30.0,
+    ):
+        self.local = TTLCache(max_size=local_size, ttl=local_ttl)
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self.redis_url = redis_url
+        self.redis_retry_after = redis_retry_after
+        self._redis = None
+        self._redis_down_until = 0.0
+
+    @property
+    def redis(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                self.redis_url,
+                decode_responses=True,
+                socket_connect_timeout=1.0,
+                socket_timeout=1.0,
+            )
+        return self._redis
+
+    def _redis_failed(self, error: Exception) -> None:
+        logger.warning(f"Response cache Redis backend unavailable: {error}")
+        self._redis_down_until = time.monotonic() + self.redis_retry_after
+
+    def ttl_for(self, workflow_type: str) -> int:
+        return self.ttls.get(workflow_type, self.default_ttl)
+
+    def make_key(
+        self,
+        user_input: str,
+        workflow_type: str,
+        model: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> str:
+        payload = {
+            "prompt": normalize_prompt(user_input),
+            "history": [
+                [message.get("role", ""), normalize_prompt(message.get("content", ""))]
+                for message in history or []
+            ],
+            "agent_type": workflow_type,
+            "model": resolve_model(model)[1],
+        }
+        digest = hashlib.sha256(
+            json.dumps(payload, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        return self.prefix + digest
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self.local.get(key)
+        if value is not None:
+            response_cache_requests.labels(tier="local", result="hit").inc()
+            return value
+        response_cache_requests.labels(tier="local", result="miss").inc()
+
+        redis = self.redis
+        if redis is None:
+            return None
+        try:
+            value = await redis.get(key)
+        except RedisError as e:
+            self._redis_failed(e)
+            return None
+
+        result = "miss" if value is None else "hit"
+        response_cache_requests.labels(tier="redis", result=result).inc()
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: str, workflow_type: str) -> None:
+        ttl = self.ttl_for(workflow_type)
+        if ttl <= 0:
+            return
+        self.local.set(key, value, ttl=min(ttl, self.local.ttl))
+
+        redis = self.redis
+        if redis is None:
+            return
+        try:
+            await redis.set(key, value, ex=ttl)
+        except RedisError as e:
+            self._redis_failed(e)
+
+    async def aclose(self) -> None:
+        self.local.clear()
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+response_cache = ResponseCache(
+    local_size=settings.response_cache_local_size,
+    local_ttl=settings.response_cache_local_ttl,
+    ttls=settings.response_cache_ttls,
+    default_ttl=settings.response_cache_default_ttl,
+    redis_url=settings.redis_url if settings.use_redis else None,
+)
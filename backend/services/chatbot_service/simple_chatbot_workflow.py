@@ -1,70 +1,51 @@
-from enum import Enum
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from llama_index.core.llms import ChatMessage
 from llama_index.core.memory import ChatMemoryBuffer
 from llama_index.core.workflow import Event, step
 
 from ... import logger
-from .base_workflow import BaseWorkflow
-
-
-class MessageRole(Enum):
-    HUMAN = "user"
-    ASSISTANT = "assistant"
-    SYSTEM = "system"
+from .base_workflow import FALLBACK_RESPONSE, BaseWorkflow, MessageRole
 
 
 class SimpleChatbotWorkflow(BaseWorkflow):
-    def __init__(self, timeout: int = 60, verbose: bool = True):
-        super().__init__(timeout=timeout, verbose=verbose)
-        self.memory = ChatMemoryBuffer.from_defaults(token_limit=1024)
+    agent_type = "simple"
 
     @step
     async def generate_response(self, event: Event) -> Event:
         user_input = event.payload
-        chat_history = "\n".join(
-            [f"{msg.role.value}: {msg.content}" for msg in self.memory.get()]
-        )
+        chat_history = event.chat_history
 
         prompt = f"Given the following conversation history:\n{chat_history}\n\nUser: {user_input}\nAssistant:"
-        response = await self.llm.acomplete(prompt)
-        return Event(payload=str(response).strip())
+        response = await self.generate(prompt)
+        return Event(payload=response)
 
     async def execute_request_workflow(
         self,
         user_input: str,
         history: List[Dict[str, str]] = None,
-        model: str = ...,
+        memory: Optional[ChatMemoryBuffer] = None,
     ) -> str:
-        logger.info(f"Model: {model}")
-        self.set_model(model)  # Set the model before executing the workflow
+        logger.info(f"Model: {self.model}")
         try:
-            if history:
-                for message in history:
-                    role = message.get("role", "").upper()
-                    if role == "USER":
-                        role = MessageRole.HUMAN
-                    elif role == "ASSISTANT":
-                        role = MessageRole.ASSISTANT
-                    else:
-                        role = MessageRole.SYSTEM
-                    self.memory.put(
-                        ChatMessage(role=role, content=message.get("content", ""))
-                    )
-
-            self.memory.put(ChatMessage(role=MessageRole.HUMAN, content=user_input))
-
-            event = await self.generate_response(Event(payload=user_input))
+            # Per-conversation memory is owned by the caller, not the instance
+            if memory is None:
+                memory = self.build_memory(history)
+
+            memory.put(ChatMessage(role=MessageRole.HUMAN, content=user_input))
+
+            event = await self.generate_response(
+                Event(payload=user_input, chat_history=self.format_memory(memory))
+            )
             response = event.payload
 
-            self.memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=response))
+            memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=response))
 
             return response
 
         except Exception as e:
             logger.error(f"Error processing request: {str(e)}")
-            return "I apologize, but I encountered an error while processing your request. Please try again later."
+            return FALLBACK_RESPONSE
 
 
 async def main():
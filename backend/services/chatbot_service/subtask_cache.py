@@ -0,0 +1,100 @@
+import hashlib
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from ...core.cache import TTLCache
+from ...core.config import settings
+from ...core.metrics import subtask_cache_requests
+from ...core.singleflight import SingleFlight
+from .llm_registry import resolve_model
+from .response_cache import normalize_prompt
+
+T = TypeVar("T")
+
+
+class SubtaskCache:
+    """
+    In-process memo of the intermediate results of multi-step requests.
+
+    Decompositions are keyed on the normalized decomposition prompt and
+    subtask results on the normalized subtask description, both together
+    with the model. Different requests on the same topic often break down
+    into the same subtasks, so these hit where whole-response caching
+    cannot. Entries expire after `ttl` seconds and the least recently used
+    ones are evicted beyond `max_size`. Concurrent misses on the same key
+    are computed once; failures are not cached.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4096,
+        ttl: float = 3600.0,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.decompositions = TTLCache(max_size=max_size, ttl=ttl, timer=timer)
+        self.results = TTLCache(max_size=max_size, ttl=ttl, timer=timer)
+        self.inflight = SingleFlight("subtask")
+
+    @staticmethod
+    def make_key(text: str, model: Optional[str]) -> str:
+        payload = f"{'/'.join(resolve_model(model))}\n{normalize_prompt(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _memoize(
+        self,
+        kind: str,
+        cache: TTLCache,
+        key: str,
+        compute: Callable[[], Awaitable[T]],
+    ) -> Tuple[T, bool]:
+        value = cache.get(key)
+        if value is not None:
+            subtask_cache_requests.labels(kind=kind, result="hit").inc()
+            return value, True
+        subtask_cache_requests.labels(kind=kind, result="miss").inc()
+
+        async def compute_and_store() -> T:
+            value = await compute()
+            if value:
+                cache.set(key, value)
+            return value
+
+        return await self.inflight.do((kind, key), compute_and_store), False
+
+    async def decomposition(
+        self,
+        prompt: str,
+        model: Optional[str],
+        compute: Callable[[], Awaitable[List[str]]],
+    ) -> Tuple[List[str], bool]:
+        """
+        Return the subtasks for a decomposition prompt and whether they came
+        from the cache.
+        """
+        key = self.make_key(prompt, model)
+        subtasks, cached = await self._memoize(
+            "decomposition", self.decompositions, key, compute
+        )
+        # Callers get their own list to modify
+        return list(subtasks), cached
+
+    async def result(
+        self,
+        description: str,
+        model: Optional[str],
+        compute: Callable[[], Awaitable[str]],
+    ) -> Tuple[str, bool]:
+        """
+        Return the result of a subtask and whether it came from the cache.
+        """
+        key = self.make_key(description, model)
+        return await self._memoize("subtask", self.results, key, compute)
+
+    def clear(self) -> None:
+        self.decompositions.clear()
+        self.results.clear()
+
+
+subtask_cache = SubtaskCache(
+    max_size=settings.subtask_cache_size, ttl=settings.subtask_cache_ttl
+)
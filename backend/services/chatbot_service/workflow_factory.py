@@ -3,14 +3,21 @@
 from .prompt_optimization_workflow import PromptOptimizationWorkflow
 from .simple_chatbot_workflow import SimpleChatbotWorkflow
 
+# Agent type names accepted in chat requests
+WORKFLOW_TYPES = {
+    workflow.agent_type: workflow
+    for workflow in (
+        PromptOptimizationWorkflow,
+        MultiStepAgentWorkflow,
+        SimpleChatbotWorkflow,
+    )
+}
+
+
 class WorkflowFactory:
     @staticmethod
     def create_workflow(workflow_type: str, **kwargs) -> BaseWorkflow:
-        if workflow_type == "prompt_optim":
-            return PromptOptimizationWorkflow(**kwargs)
-        elif workflow_type == "multi_step":
-            return MultiStepAgentWorkflow(**kwargs)
-        elif workflow_type == "simple":
-            return SimpleChatbotWorkflow(**kwargs)
-        else:
+        workflow = WORKFLOW_TYPES.get(workflow_type)
+        if workflow is None:
             raise ValueError(f"Invalid workflow type: {workflow_type}")
+        return workflow(**kwargs)
@@ -0,0 +1,55 @@
+from collections import OrderedDict
+from typing import Tuple
+
+from ... import logger
+from .base_workflow import BaseWorkflow
+from .llm_registry import resolve_model
+from .workflow_factory import WorkflowFactory
+
+
+class WorkflowPool:
+    """
+    Bounded LRU pool of workflow instances keyed by (agent type, model).
+
+    Workflows are stateless with respect to conversations, so one instance per
+    key is handed out to every request using that agent type and model. The
+    least recently used instance is evicted once `max_size` is reached.
+    """
+
+    def __init__(self, max_size: int = 16, **workflow_kwargs):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.workflow_kwargs = workflow_kwargs
+        self._workflows: "OrderedDict[Tuple[str, str], BaseWorkflow]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._workflows)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._workflows
+
+    def acquire(self, workflow_type: str, model: str = None) -> BaseWorkflow:
+        """
+        Return the pooled workflow for the given agent type and model,
+        constructing it on first use.
+        """
+        # Unknown models share the fallback model's entry
+        _, model = resolve_model(model)
+        key = (workflow_type, model)
+        workflow = self._workflows.get(key)
+        if workflow is not None:
+            self._workflows.move_to_end(key)
+            return workflow
+
+        workflow = WorkflowFactory.create_workflow(
+            workflow_type, model=model, **self.workflow_kwargs
+        )
+        self._workflows[key] = workflow
+        if len(self._workflows) > self.max_size:
+            evicted, _ = self._workflows.popitem(last=False)
+            logger.debug(f"Evicted workflow {evicted} from pool")
+        return workflow
+
+    def clear(self) -> None:
+        self._workflows.clear()
@@ -0,0 +1,164 @@
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..crud.conversation import (
+    SENDER_ROLES,
+    get_conversation,
+    get_unsummarized_messages,
+)
+
+# Prefix of the system message carrying a conversation's rolling summary
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+
+class ConversationHistoryStore:
+    """
+    Serves the recent history of server-side conversations.
+
+    The history is every message not yet folded into the conversation's
+    rolling summary, and at least the last `window` messages; the summary is
+    returned as a leading system message. Messages waiting for a summary
+    batch therefore stay in the prompt, which is capped at the last
+    `max_messages` in case summaries fall behind.
+
+    Histories are loaded from the `messages` table once and then kept in a
+    hot in-process cache that is extended with every new turn, so continuing
+    a conversation costs neither a client resend of the full history nor a
+    database read per request.
+
+    The cache is per process and only updated by the turns this process
+    handles, so it assumes one worker (or sticky routing by conversation).
+    With several workers, a turn served elsewhere leaves the window stale
+    until it expires; set `ttl` to 0 there to always read the database.
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        max_messages: Optional[int] = None,
+        cache_size: int = 1024,
+        ttl: float = 900.0,
+    ):
+        self.window = window
+        self.max_messages = max(max_messages or window, window)
+        self.enabled = ttl > 0
+        self._cache = TTLCache(max_size=cache_size, ttl=ttl)
+
+    async def load(
+        self, db: AsyncSession, conversation_id: UUID, user_id: UUID
+    ) -> List[Dict[str, str]]:
+        """
+        Return the recent history of a conversation owned by `user_id`.
+
+        Raises a 404 if the conversation does not exist or belongs to someone
+        else.
+        """
+        # (owner, summary, messages, index of the first unsummarized message);
+        # the index goes negative once unsummarized messages were capped off
+        entry: Optional[Tuple[UUID, Optional[str], List[Dict[str, str]], int]] = (
+            self._cache.get(conversation_id)
+        )
+        if entry is not None:
+            owner_id, summary, messages, _ = entry
+            if owner_id == user_id:
+                return self._history(summary, messages)
+        else:
+            conversation = await get_conversation(db, conversation_id, user_id)
+            if conversation is not None:
+                since = conversation.summarized_until
+                rows = await get_unsummarized_messages(
+                    db, conversation_id, since, self.window, self.max_messages
+                )
+                messages = [
+                    {"role": SENDER_ROLES.get(sender, "system"), "content": content}
+                    for sender, content, _ in rows
+                ]
+                start = sum(
+                    1 for _, _, timestamp in rows if since and timestamp <= since
+                )
+                if self.enabled:
+                    self._cache.set(
+                        conversation_id,
+                        (user_id, conversation.summary, messages, start),
+                    )
+                return self._history(conversation.summary, messages)
+
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found",
+        )
+
+    def append(
+        self,
+        conversation_id: UUID,
+        user_id: UUID,
+        user_message: str,
+        bot_response: str,
+        new: bool = False,
+    ) -> None:
+        """
+        Extend the cached history of a conversation with a new turn.
+
+        Conversations that are not cached (and not `new`) are left alone; the
+        next `load` reads their history from the database.
+        """
+        entry = self._cache.pop(conversation_id)
+        if not self.enabled or (entry is None and not new):
+            return
+        summary, messages, start = entry[1:] if entry is not None else (None, [], 0)
+        messages = messages + [
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": bot_response},
+        ]
+        cut = max(0, len(messages) - self.max_messages)
+        self._cache.set(
+            conversation_id, (user_id, summary, messages[cut:], start - cut)
+        )
+
+    def set_summary(self, conversation_id: UUID, summary: str, folded: int) -> None:
+        """
+        Replace the cached summary of a conversation, if it is cached, after
+        `folded` more of its messages were summarized.
+        """
+        entry = self._cache.pop(conversation_id)
+        if entry is not None:
+            owner_id, _, messages, start = entry
+            start += folded
+            cut = max(0, min(start, len(messages) - self.window))
+            self._cache.set(
+                conversation_id, (owner_id, summary, messages[cut:], start - cut)
+            )
+
+    def discard(self, conversation_id: UUID) -> None:
+        """
+        Forget the cached history of a conversation, e.g. after one of its
+        turns failed to persist.
+        """
+        self._cache.pop(conversation_id)
+
+    @staticmethod
+    def _history(
+        summary: Optional[str], messages: List[Dict[str, str]]
+    ) -> List[Dict[str, str]]:
+        if not summary:
+            return list(messages)
+        return [{"role": "system", "content": SUMMARY_PREFIX + summary}, *messages]
+
+
+conversation_history = ConversationHistoryStore(
+    window=settings.conversation_history_window,
+    # Room for a batch waiting to be summarized and one being summarized
+    max_messages=(
+        settings.conversation_history_window
+        + 2 * settings.conversation_summary_batch_size
+        if settings.conversation_summary_enabled
+        else settings.conversation_history_window
+    ),
+    cache_size=settings.conversation_cache_size,
+    ttl=settings.conversation_cache_ttl,
+)
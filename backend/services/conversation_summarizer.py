@@ -0,0 +1,143 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from llama_index.core.llms import LLM
+
+from .. import logger
+from ..core.config import settings
+from ..core.database import async_session_maker
+from ..crud.conversation import (
+    SENDER_ROLES,
+    get_messages_to_summarize,
+    update_conversation_summary,
+)
+from ..models.conversation import Conversation
+from .chatbot_service.base_workflow import observe_llm_call, send_llm_request
+from .chatbot_service.llm_registry import llm_registry
+from .conversation_history import ConversationHistoryStore, conversation_history
+
+SUMMARY_PROMPT = (
+    "Progressively summarize the conversation below, extending the current "
+    "summary with the new lines. Keep facts, names, decisions and open "
+    "questions the assistant may need later. Answer with the new summary "
+    "only, in at most 200 words.\n\n"
+    "Current summary:\n{summary}\n\n"
+    "New lines:\n{lines}\n\n"
+    "New summary:"
+)
+
+
+class ConversationSummarizer:
+    """
+    Folds messages that fall out of the verbatim history window into a
+    rolling summary stored with the conversation.
+
+    Summaries are produced in background tasks after the response has been
+    sent, at most one at a time per conversation, so prompts stay bounded
+    without adding latency to the chat request. Messages are folded in full
+    batches of `batch_size`, so a long conversation costs one summary call
+    per `batch_size` messages rather than one per turn; until their batch is
+    full they stay in the history verbatim. The calls share the chat requests' concurrency
+    limits, retries and metrics.
+    """
+
+    def __init__(
+        self,
+        window: int = 8,
+        batch_size: int = 40,
+        model: Optional[str] = None,
+        store: ConversationHistoryStore = conversation_history,
+        session_maker=async_session_maker,
+    ):
+        self.window = window
+        self.batch_size = batch_size
+        self.model = model
+        # Resolved from the registry on first use unless set explicitly
+        self.llm: Optional[LLM] = None
+        self.store = store
+        self.session_maker = session_maker
+        self._tasks: Dict[UUID, asyncio.Task] = {}
+
+    def schedule(self, conversation_id: UUID) -> None:
+        """
+        Start summarizing `conversation_id` in the background unless a run for
+        it is already in progress.
+        """
+        if conversation_id in self._tasks:
+            return
+        task = asyncio.create_task(self._run(conversation_id))
+        self._tasks[conversation_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(conversation_id, None))
+
+    async def stop(self) -> None:
+        """
+        Cancel runs still in progress; they resume on the next turn.
+        """
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, conversation_id: UUID) -> None:
+        try:
+            await self.summarize(conversation_id)
+        except Exception as e:
+            logger.error(f"Failed to summarize conversation {conversation_id}: {e}")
+
+    async def summarize(self, conversation_id: UUID) -> Optional[str]:
+        """
+        Fold the messages older than the verbatim window into the summary, in
+        full batches, and return the new summary, or None if fewer than
+        `batch_size` messages were waiting.
+        """
+        summary = None
+        async with self.session_maker() as db:
+            conversation = await db.get(Conversation, conversation_id)
+            if conversation is None:
+                return None
+            current, until = conversation.summary, conversation.summarized_until
+
+            while True:
+                rows = await get_messages_to_summarize(
+                    db,
+                    conversation_id,
+                    keep=self.window,
+                    since=until,
+                    limit=self.batch_size,
+                )
+                if len(rows) < self.batch_size:
+                    break
+                summary = await self._extend(current, rows)
+                if not await update_conversation_summary(
+                    db, conversation_id, summary, rows[-1][2], previous_until=until
+                ):
+                    # Another worker summarized concurrently; keep its result
+                    return None
+                current, until = summary, rows[-1][2]
+                self.store.set_summary(conversation_id, summary, len(rows))
+        return summary
+
+    async def _extend(
+        self, summary: Optional[str], rows: List[Tuple[str, str, datetime]]
+    ) -> str:
+        lines = "\n".join(
+            f"{SENDER_ROLES.get(sender, 'system')}: {content}"
+            for sender, content, _ in rows
+        )
+        prompt = SUMMARY_PROMPT.format(summary=summary or "(none)", lines=lines)
+        if self.llm is None:
+            self.llm = llm_registry.get(self.model)
+        with observe_llm_call("summarizer", self.model, "complete"):
+            response = await send_llm_request(
+                self.llm, self.model, lambda llm: llm.acomplete(prompt)
+            )
+        return str(response).strip()
+
+
+conversation_summarizer = ConversationSummarizer(
+    window=settings.conversation_history_window,
+    batch_size=settings.conversation_summary_batch_size,
+    model=settings.conversation_summary_model,
+)
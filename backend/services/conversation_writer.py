@@ -0,0 +1,151 @@
+import asyncio
+import time
+from typing import List, Optional
+
+from .. import logger
+from ..core.config import settings
+from ..core.database import async_session_maker
+from ..core.metrics import (
+    persistence_flush_seconds,
+    persistence_queue_depth,
+    persistence_turns,
+)
+from ..crud.conversation import ConversationTurn, save_conversation_turns
+from .conversation_history import ConversationHistoryStore, conversation_history
+
+
+class ConversationWriter:
+    """
+    Write-behind persistence for chat turns.
+
+    Endpoints enqueue turns and return immediately; a background task drains
+    the bounded queue in batches of up to `batch_size` turns (or whatever
+    arrived within `flush_interval` seconds) and writes each batch with one
+    multi-row INSERT. When the queue is full, `enqueue` waits for room, which
+    pushes back on producers instead of growing memory without bound.
+
+    A batch that fails is retried in halves, so a bad row only loses its own
+    turn. Lost turns are dropped from the history cache, which had already
+    been extended with them.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 10_000,
+        batch_size: int = 200,
+        flush_interval: float = 0.05,
+        session_maker=async_session_maker,
+        store: ConversationHistoryStore = conversation_history,
+    ):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.session_maker = session_maker
+        self.store = store
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+        persistence_queue_depth.set_function(self.qsize)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background task after flushing everything still queued.
+        """
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # A batch being written when the task was cancelled keeps going
+        # detached; wait for it before the engine is closed
+        if self._flushing is not None:
+            await self._flushing
+            self._flushing = None
+
+        # Flush whatever is left, including turns enqueued during shutdown
+        while not self._queue.empty():
+            await self._flush(self._take(self.batch_size))
+
+    async def enqueue(self, turn: ConversationTurn) -> None:
+        await self._queue.put(turn)
+
+    def _take(self, limit: int) -> List[ConversationTurn]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                # Give concurrent requests a moment to join the batch
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            finally:
+                # Also runs on cancellation so a shutdown never loses a batch
+                self._flushing = asyncio.create_task(self._flush(batch))
+                await asyncio.shield(self._flushing)
+
+    async def _flush(self, batch: List[ConversationTurn]) -> None:
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            await self._save(batch)
+        finally:
+            persistence_flush_seconds.observe(time.perf_counter() - start)
+
+    async def _save(self, turns: List[ConversationTurn]) -> None:
+        try:
+            async with self.session_maker() as db:
+                await save_conversation_turns(db, turns)
+        except Exception as e:
+            if len(turns) > 1:
+                # Halves keep their order, so new conversations still come
+                # before the turns that continue them
+                middle = len(turns) // 2
+                await self._save(turns[:middle])
+                await self._save(turns[middle:])
+                return
+            turn = turns[0]
+            persistence_turns.labels(result="failed").inc()
+            logger.error(
+                f"Failed to persist a turn of conversation {turn.conversation_id}: {e}"
+            )
+            # Later loads read what was actually stored; a lost new
+            # conversation then answers 404 instead of failing every batch
+            # its follow-up turns land in
+            self.store.discard(turn.conversation_id)
+        else:
+            persistence_turns.labels(result="saved").inc(len(turns))
+
+
+conversation_writer = ConversationWriter(
+    max_queue_size=settings.persistence_queue_size,
+    batch_size=settings.persistence_batch_size,
+    flush_interval=settings.persistence_flush_interval,
+)
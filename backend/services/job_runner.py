@@ -0,0 +1,242 @@
+import asyncio
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+from uuid import UUID
+
+from .. import logger
+from ..core.config import settings
+from ..core.database import async_session_maker
+from ..core.metrics import chat_job_queue_seconds, chat_jobs, chat_jobs_running
+from ..crud.conversation import ConversationTurn, save_conversation_turns
+from ..crud.job import claim_next_job, finish_job, requeue_jobs, update_job_progress
+from ..models.job import Job
+from ..schemas.chatbot import ChatRequest
+from .chatbot_service import ChatbotService
+from .chatbot_service.base_workflow import FALLBACK_RESPONSE
+from .chatbot_service.llm_scheduler import llm_user
+from .conversation_history import conversation_history
+from .conversation_summarizer import conversation_summarizer
+
+
+class JobRunner:
+    """
+    Pool of background workers executing chat requests submitted as jobs.
+
+    Jobs live in the `jobs` table, so they survive restarts and any number
+    of processes can run workers: each claims the oldest queued job with a
+    compare-and-set on its status. Workers wake up when a job is submitted
+    in this process and otherwise poll every `poll_interval` seconds.
+    Progress events are stored as they happen, and the final answer is
+    saved together with the conversation turn.
+
+    Jobs interrupted by a shutdown are requeued on `stop`; jobs of a worker
+    that died are requeued once they have been running for `stale_after`
+    seconds, until they used up `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        poll_interval: float = 1.0,
+        stale_after: float = 300.0,
+        max_attempts: int = 3,
+        service: Optional[ChatbotService] = None,
+        session_maker=async_session_maker,
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.service = service or ChatbotService()
+        self.session_maker = session_maker
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._updates: Dict[UUID, asyncio.Event] = {}
+        self._watchers: Counter = Counter()
+        self._running: Set[UUID] = set()
+        self._requeued_at = 0.0
+        chat_jobs_running.set_function(lambda: len(self._running))
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """
+        Cancel the workers and put the jobs they were running back in the
+        queue.
+        """
+        interrupted = list(self._running)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if interrupted:
+            async with self.session_maker() as db:
+                requeued = await requeue_jobs(
+                    db, datetime.utcnow(), self.max_attempts, job_ids=interrupted
+                )
+            chat_jobs.labels("unknown", "requeued").inc(requeued)
+
+    def notify_submitted(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait_for_update(self, job_id: UUID, timeout: float) -> None:
+        """
+        Wait until this process updates the job, or at most `timeout` seconds
+        (jobs run by other processes are only noticed by polling).
+        """
+        event = self._updates.setdefault(job_id, asyncio.Event())
+        self._watchers[job_id] += 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._watchers[job_id] -= 1
+            if not self._watchers[job_id]:
+                # Jobs run by other processes are never notified here
+                del self._watchers[job_id]
+                if self._updates.get(job_id) is event:
+                    del self._updates[job_id]
+
+    def _notify(self, job_id: UUID) -> None:
+        event = self._updates.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                async with self.session_maker() as db:
+                    job = await claim_next_job(db)
+            except Exception as e:
+                logger.error(f"Failed to claim a job: {e}")
+                job = None
+            if job is not None:
+                await self._execute(job)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                await self._requeue_stale()
+            self._wakeup.clear()
+
+    async def _requeue_stale(self) -> None:
+        if time.monotonic() - self._requeued_at < self.stale_after / 10:
+            return
+        self._requeued_at = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        try:
+            async with self.session_maker() as db:
+                requeued = await requeue_jobs(db, cutoff, self.max_attempts)
+        except Exception as e:
+            logger.error(f"Failed to requeue stale jobs: {e}")
+            return
+        if requeued:
+            logger.warning(f"Requeued {requeued} stale jobs")
+            chat_jobs.labels("unknown", "requeued").inc(requeued)
+
+    async def _save_progress(self, job: Job, progress: List[Dict[str, Any]]):
+        try:
+            async with self.session_maker() as db:
+                await update_job_progress(db, job.id, job.attempts, list(progress))
+        except Exception as e:
+            logger.error(f"Failed to save progress of job {job.id}: {e}")
+            return
+        self._notify(job.id)
+
+    async def _execute(self, job: Job) -> None:
+        request = ChatRequest(**job.request)
+        chat_job_queue_seconds.observe(
+            (job.started_at - job.created_at).total_seconds()
+        )
+        self._running.add(job.id)
+        # Queue the job's LLM calls fairly against other users' calls
+        token = llm_user.set(str(job.user_id))
+        try:
+            progress: List[Dict[str, Any]] = []
+            response = None
+            async for event, data in self.service.stream_request(
+                user_input=request.prompt.strip(),
+                workflow_type=request.agent_type,
+                history=request.history,
+                model=request.model,
+                use_cache=not (request.metadata or {}).get("no_cache", False),
+            ):
+                if event == "progress":
+                    progress.append(data)
+                    await self._save_progress(job, progress)
+                elif event == "done":
+                    response = str(data["response"]).strip()
+
+            turn = ConversationTurn(
+                conversation_id=request.conversation_id or uuid.uuid4(),
+                user_id=job.user_id,
+                user_message=request.prompt,
+                bot_response=response,
+                new_conversation=request.conversation_id is None,
+                user_timestamp=job.created_at,
+            )
+            async with self.session_maker() as db:
+                # Committed together with the turn
+                finished = await finish_job(
+                    db, job.id, job.attempts, response, turn.conversation_id
+                )
+                if not finished:
+                    # Requeued as stale meanwhile; the retry saves its own turn
+                    await db.rollback()
+                    logger.warning(f"Job {job.id} was requeued, dropping its result")
+                    chat_jobs.labels(request.agent_type, "superseded").inc()
+                    return
+                await save_conversation_turns(db, [turn])
+            conversation_history.append(
+                turn.conversation_id,
+                job.user_id,
+                turn.user_message,
+                response,
+                new=turn.new_conversation,
+            )
+            if settings.conversation_summary_enabled and request.conversation_id:
+                conversation_summarizer.schedule(turn.conversation_id)
+            result = "fallback" if response == FALLBACK_RESPONSE else "ok"
+            chat_jobs.labels(request.agent_type, result).inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            chat_jobs.labels(request.agent_type, "error").inc()
+            try:
+                async with self.session_maker() as db:
+                    await finish_job(
+                        db,
+                        job.id,
+                        job.attempts,
+                        error="An error occurred while processing your request.",
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Failed to record the failure of job {job.id}: {e}")
+        finally:
+            llm_user.reset(token)
+            self._running.discard(job.id)
+            self._notify(job.id)
+
+
+job_runner = JobRunner(
+    workers=settings.job_workers,
+    poll_interval=settings.job_poll_interval,
+    stale_after=settings.job_stale_after,
+    max_attempts=settings.job_max_attempts,
+)
@@ -0,0 +1,56 @@
+from typing import Optional
+
+from sqlalchemy import event, inspect
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.metrics import principal_cache_hit_ratio, principal_cache_requests
+from ..models.user import User
+
+
+class PrincipalCache:
+    """
+    Short-lived cache of authenticated users keyed by token subject.
+
+    It saves the `users` lookup that `get_current_user` would otherwise do on
+    every request. Entries are dropped when the user row is updated or deleted
+    through the ORM; writes that bypass the ORM must call `invalidate`. Other
+    workers pick up changes within `ttl` seconds.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 60.0):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    @property
+    def hit_rate(self) -> float:
+        return self._cache.hit_rate
+
+    def get(self, username: str) -> Optional[User]:
+        user = self._cache.get(username)
+        principal_cache_requests.labels(result="miss" if user is None else "hit").inc()
+        return user
+
+    def set(self, username: str, user: User) -> None:
+        self._cache.set(username, user)
+
+    def invalidate(self, username: str) -> None:
+        self._cache.pop(username)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl,
+)
+principal_cache_hit_ratio.set_function(lambda: principal_cache.hit_rate)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User) -> None:
+    principal_cache.invalidate(target.username)
+    # A renamed user must not stay reachable under the old name
+    for username in inspect(target).attrs.username.history.deleted:
+        principal_cache.invalidate(username)
@@ -0,0 +1,7 @@
+import pytest
+
+
+# Run anyio-marked tests on asyncio only, matching the app's event loop
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
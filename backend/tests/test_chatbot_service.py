@@ -0,0 +1,264 @@
+import asyncio
+
+import pytest
+from llama_index.core.llms import MockLLM
+from prometheus_client import REGISTRY
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..services.chatbot_service import ChatbotService
+from ..services.chatbot_service.base_workflow import FALLBACK_RESPONSE
+from ..services.chatbot_service.multi_step_agent_workflow import (
+    MultiStepAgentWorkflow,
+)
+from ..services.chatbot_service.hedging import (
+    LatencyTracker,
+    hedged,
+    latency_tracker,
+)
+from ..services.chatbot_service.resilience import resilient_caller
+from ..services.chatbot_service.response_cache import ResponseCache
+from ..services.chatbot_service.subtask_cache import SubtaskCache
+
+
+@pytest.fixture
+def service():
+    service = ChatbotService(cache=ResponseCache(redis_url=None))
+    workflow = service.workflow_pool.acquire("simple", None)
+    workflow.llm = MockLLM(max_tokens=3)
+    yield service
+    service.workflow_pool.clear()
+
+
+@pytest.mark.anyio
+async def test_stream_request_emits_tokens_then_done(service):
+    events = [event async for event in service.stream_request("Hello there", "simple")]
+    assert [name for name, _ in events] == ["token", "token", "token", "done"]
+    assert (
+        events[-1][1]["response"]
+        == "".join(data["delta"] for _, data in events[:-1]).strip()
+    )
+
+
+@pytest.mark.anyio
+async def test_process_request_matches_streamed_response(service):
+    streamed = [
+        data
+        async for name, data in service.stream_request("Hello", "simple")
+        if name == "done"
+    ]
+    response = await service.process_request("Hello", "simple")
+    assert response == streamed[0]["response"]
+
+
+@pytest.mark.anyio
+async def test_repeated_prompt_is_served_from_cache(service):
+    first = await service.process_request("What is  MLOps?", "simple")
+
+    # A different LLM would answer differently; the cache must short-circuit it
+    service.workflow_pool.acquire("simple", None).llm = MockLLM(max_tokens=1)
+    assert await service.process_request("what is mlops?", "simple") == first
+    assert service.response_cache.local.hits == 1
+
+    bypassed = await service.process_request(
+        "What is MLOps?", "simple", use_cache=False
+    )
+    assert bypassed != first
+
+
+def test_cache_key_covers_the_whole_history():
+    cache = ResponseCache(redis_url=None)
+    tail = [{"role": "user", "content": f"Message {index}"} for index in range(6)]
+    alice = [{"role": "system", "content": "Summary: Alice lives in Paris."}] + tail
+    bob = [{"role": "system", "content": "Summary: Bob lives in Rome."}] + tail
+    assert cache.make_key("Where do I live?", "simple", history=alice) != (
+        cache.make_key("Where do I live?", "simple", history=bob)
+    )
+
+
+@pytest.mark.anyio
+async def test_fallback_responses_are_not_cached(service):
+    workflow = service.workflow_pool.acquire("simple", None)
+    workflow.llm = None  # every call fails
+    assert await service.process_request("Hello", "simple") == FALLBACK_RESPONSE
+    assert len(service.response_cache.local) == 0
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.anyio
+async def test_steps_and_llm_calls_are_timed(service):
+    step = dict(
+        agent_type="simple", model="llama-3.1-70b-versatile", step="generate_response"
+    )
+    stream = dict(agent_type="simple", model="llama-3.1-70b-versatile")
+    steps = sample("workflow_step_seconds_count", **step)
+    calls = sample("llm_call_seconds_count", **stream, call="stream")
+    first_tokens = sample("llm_time_to_first_token_seconds_count", **stream)
+
+    async for _ in service.stream_request("Time me", "simple", use_cache=False):
+        pass
+
+    assert sample("workflow_step_seconds_count", **step) == steps + 1
+    assert sample("llm_call_seconds_count", **stream, call="stream") == calls + 1
+    assert sample("llm_time_to_first_token_seconds_count", **stream) == first_tokens + 1
+
+
+def test_ttl_cache_expires_and_evicts():
+    now = [0.0]
+    cache = TTLCache(max_size=2, ttl=10, timer=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=1)
+    now[0] = 5
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    cache.set("c", 3)
+    cache.set("d", 4)
+    assert "a" not in cache
+    assert cache.hits == 1 and cache.misses == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("workflow_type", ["simple", "prompt_optim", "multi_step"])
+async def test_workflows_run_offline_on_fake_provider(monkeypatch, workflow_type):
+    monkeypatch.setattr(settings, "llm_fake_enabled", True)
+    service = ChatbotService(cache=ResponseCache(redis_url=None))
+    response = await service.process_request(
+        "Plan a data pipeline", workflow_type, model="fake/instant", use_cache=False
+    )
+    assert response and response != FALLBACK_RESPONSE
+
+
+@pytest.mark.anyio
+async def test_subtask_cache_memoizes_and_coalesces():
+    cache = SubtaskCache(max_size=8, ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "MLOps is..."
+
+    first = await asyncio.gather(
+        cache.result("Define MLOps", "gpt-4o", compute),
+        cache.result("define  mlops", "gpt-4o", compute),
+    )
+    assert [result for result, _ in first] == ["MLOps is...", "MLOps is..."]
+    assert await cache.result("Define MLOps.", "gpt-4o", compute) == (
+        "MLOps is...",
+        False,
+    )
+    assert await cache.result("DEFINE MLOPS", "gpt-4o", compute) == (
+        "MLOps is...",
+        True,
+    )
+    await cache.result("Define MLOps", "gpt-4o-mini", compute)
+    assert len(calls) == 3
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await cache.result("Fails", "gpt-4o", fail)
+    assert await cache.result("Fails", "gpt-4o", compute) == ("MLOps is...", False)
+
+
+@pytest.mark.anyio
+async def test_multi_step_reuses_cached_decomposition_and_subtasks(monkeypatch):
+    monkeypatch.setattr(settings, "llm_fake_enabled", True)
+    monkeypatch.setattr(MultiStepAgentWorkflow, "subtask_cache", SubtaskCache())
+
+    async def progress(use_cache, history=None):
+        # A fresh response cache each time, so only the subtask cache can hit
+        service = ChatbotService(cache=ResponseCache(redis_url=None))
+        return [
+            data
+            async for name, data in service.stream_request(
+                "Plan a data pipeline",
+                "multi_step",
+                history=history,
+                model="fake/instant",
+                use_cache=use_cache,
+            )
+            if name == "progress" and data["step"] in ("decomposition", "subtask")
+        ]
+
+    # no_cache requests neither read nor fill the subtask cache
+    first, second = await progress(False), await progress(False)
+    assert [event["cached"] for event in first + second] == [False] * 8
+    assert len(MultiStepAgentWorkflow.subtask_cache.results) == 0
+
+    first, second = await progress(True), await progress(True)
+    assert [event["cached"] for event in first] == [False] * len(first)
+    assert [event["cached"] for event in second] == [True] * len(second)
+    assert len(second) == 4
+
+    # The decomposition depends on the conversation, so other history misses
+    other = await progress(True, history=[{"role": "user", "content": "Hi"}])
+    assert other[0]["step"] == "decomposition" and not other[0]["cached"]
+
+
+def test_hedge_delay_follows_latency_percentile():
+    tracker = LatencyTracker(percentile=90, min_samples=10, initial_delay=2.0)
+    assert tracker.delay("model") == 2.0
+    for latency in range(1, 11):
+        tracker.observe("model", latency / 10)
+    assert tracker.delay("model") == 0.9
+    assert tracker.delay("other") == 2.0
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "primary, delay, reason",
+    [
+        ("fake/slow?latency=30&latency_sigma=0", 0.05, "slow"),
+        ("fake/instant?failure_rate=1", 30, "error"),
+    ],
+)
+async def test_llm_calls_are_hedged_to_the_secondary_model(
+    monkeypatch, primary, delay, reason
+):
+    monkeypatch.setattr(settings, "llm_fake_enabled", True)
+    monkeypatch.setattr(settings, "llm_hedge_models", {primary: "fake/instant"})
+    monkeypatch.setattr(latency_tracker, "initial_delay", delay)
+    monkeypatch.setattr(resilient_caller, "max_attempts", 1)
+    labels = dict(agent_type="simple", model=primary, call="stream")
+    hedges = sample("llm_hedge_requests_total", **labels, reason=reason)
+    wins = sample("llm_hedge_wins_total", **labels, winner="secondary")
+
+    service = ChatbotService(cache=ResponseCache(redis_url=None))
+    events = [
+        event
+        async for event in service.stream_request(
+            "Plan a data pipeline", "simple", model=primary, use_cache=False
+        )
+    ]
+    response = events[-1][1]["response"]
+    assert response and response != FALLBACK_RESPONSE
+    assert sample("llm_hedge_requests_total", **labels, reason=reason) == hedges + 1
+    assert sample("llm_hedge_wins_total", **labels, winner="secondary") == wins + 1
+
+
+@pytest.mark.anyio
+async def test_hedge_discards_a_losing_result_that_completed():
+    secondary_done = asyncio.Event()
+    discarded = []
+
+    async def primary():
+        await secondary_done.wait()
+        return "primary"
+
+    async def secondary():
+        secondary_done.set()
+        return "secondary"
+
+    async def discard(result):
+        discarded.append(result)
+
+    # Both calls finish before the race is looked at again
+    result = await hedged(primary, secondary, 0.01, discard)
+    await asyncio.sleep(0.01)
+    assert result == ("primary", "primary", "slow")
+    assert discarded == ["secondary"]
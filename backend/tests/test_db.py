@@ -1,13 +1,39 @@
 import asyncio
+import json
+import uuid
+from datetime import datetime
 
+import httpx
 import pytest
+from fastapi import HTTPException
+from llama_index.core.llms import MockLLM
+from prometheus_client import REGISTRY
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from ..core.database import Base, get_session
+from ..core.rate_limit import rate_limiter
+from ..core.security import create_access_token
+from ..crud.conversation import (
+    ConversationTurn,
+    get_recent_messages,
+    save_conversation,
+)
+from ..crud.job import claim_next_job, create_job, finish_job, requeue_jobs
 from ..crud.user import authenticate_user, create_user, get_user_by_email
 from ..main import app
+from ..routers.chatbot import chatbot_service
+from ..routers.conversations import (
+    list_conversations_endpoint,
+    list_messages_endpoint,
+)
+from ..routers.auth import get_current_user
 from ..schemas.user import UserCreate
+from ..services.conversation_history import SUMMARY_PREFIX, ConversationHistoryStore
+from ..services.conversation_summarizer import ConversationSummarizer
+from ..services.conversation_writer import ConversationWriter
+from ..services.job_runner import JobRunner
+from ..services.principal_cache import PrincipalCache, principal_cache
 
 # Use an in-memory SQLite database for testing
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -87,3 +113,465 @@ async def test_authenticate_user(async_session):
     user = await authenticate_user(async_session, "testuser", "testpassword")
     assert user is not None
     assert user.username == "testuser"
+
+    by_email = await authenticate_user(
+        async_session, "testuser@example.com", "testpassword"
+    )
+    assert by_email is not None and by_email.id == user.id
+    assert await authenticate_user(async_session, "testuser", "wrong") is None
+
+
+@pytest.mark.anyio
+async def test_save_conversation_appends_turns(async_session):
+    user = await get_user_by_email(async_session, "testuser@example.com")
+    conversation_id = await save_conversation(async_session, user.id, "Hi", "Hello!")
+    same_id = await save_conversation(
+        async_session, user.id, "What is MLOps?", "A practice.", conversation_id
+    )
+    assert same_id == conversation_id
+
+    history = await get_recent_messages(async_session, conversation_id, limit=3)
+    assert [message["role"] for message in history] == [
+        "assistant",
+        "user",
+        "assistant",
+    ]
+    assert history[-1]["content"] == "A practice."
+
+
+@pytest.mark.anyio
+async def test_history_store_checks_ownership(async_session):
+    user = await get_user_by_email(async_session, "testuser@example.com")
+    conversation_id = await save_conversation(async_session, user.id, "Hi", "Hello!")
+    store = ConversationHistoryStore(window=4)
+
+    history = await store.load(async_session, conversation_id, user.id)
+    assert history == [
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": "Hello!"},
+    ]
+
+    store.append(conversation_id, user.id, "Bye", "Goodbye!")
+    assert len(await store.load(async_session, conversation_id, user.id)) == 4
+
+    with pytest.raises(HTTPException):
+        await store.load(async_session, conversation_id, uuid.uuid4())
+
+    # Without the cache every load reads the turns saved by other workers
+    uncached = ConversationHistoryStore(window=4, ttl=0)
+    await uncached.load(async_session, conversation_id, user.id)
+    uncached.append(conversation_id, user.id, "Bye", "Goodbye!")
+    await save_conversation(
+        async_session, user.id, "Again", "Hello again!", conversation_id
+    )
+    history = await uncached.load(async_session, conversation_id, user.id)
+    assert history[-1] == {"role": "assistant", "content": "Hello again!"}
+
+
+@pytest.mark.anyio
+async def test_conversation_writer_flushes_on_stop(test_engine, async_session):
+    user = await get_user_by_email(async_session, "testuser@example.com")
+    writer = ConversationWriter(
+        batch_size=2,
+        session_maker=sessionmaker(
+            test_engine, class_=AsyncSession, expire_on_commit=False
+        ),
+    )
+    await writer.start()
+
+    conversation_id = uuid.uuid4()
+    for index in range(3):
+        await writer.enqueue(
+            ConversationTurn(
+                conversation_id=conversation_id,
+                user_id=user.id,
+                user_message=f"question {index}",
+                bot_response=f"answer {index}",
+                new_conversation=index == 0,
+            )
+        )
+    await writer.stop()
+
+    assert writer.qsize() == 0
+    history = await get_recent_messages(async_session, conversation_id)
+    assert [message["content"] for message in history][-2:] == [
+        "question 2",
+        "answer 2",
+    ]
+    assert len(history) == 6
+
+
+@pytest.mark.anyio
+async def test_conversation_writer_drops_only_failing_turns(test_engine, async_session):
+    user = await get_user_by_email(async_session, "testuser@example.com")
+    store = ConversationHistoryStore(window=4)
+    writer = ConversationWriter(
+        batch_size=5,
+        flush_interval=1,
+        session_maker=sessionmaker(
+            test_engine, class_=AsyncSession, expire_on_commit=False
+        ),
+        store=store,
+    )
+    await writer.start()
+
+    turns = [
+        ConversationTurn(
+            conversation_id=uuid.uuid4(),
+            user_id=user.id,
+            user_message=f"question {index}",
+            # Messages require content, so this turn fails to insert
+            bot_response=None if index == 2 else f"answer {index}",
+            new_conversation=True,
+        )
+        for index in range(5)
+    ]
+    for turn in turns:
+        store.append(turn.conversation_id, user.id, turn.user_message, "", new=True)
+        await writer.enqueue(turn)
+    await writer.stop()
+
+    for index, turn in enumerate(turns):
+        history = await get_recent_messages(async_session, turn.conversation_id)
+        assert len(history) == (0 if index == 2 else 2)
+    # The lost conversation is no longer served from the cache
+    with pytest.raises(HTTPException):
+        await store.load(async_session, turns[2].conversation_id, user.id)
+    assert len(await store.load(async_session, turns[3].conversation_id, user.id)) == 2
+
+
+@pytest.mark.anyio
+async def test_conversation_writer_stop_waits_for_flush_in_flight():
+    writer = ConversationWriter(flush_interval=0)
+    flushed = []
+
+    async def slow_flush(batch):
+        await asyncio.sleep(0.1)
+        flushed.extend(batch)
+
+    writer._flush = slow_flush
+    await writer.start()
+    turn = ConversationTurn(
+        conversation_id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        user_message="question",
+        bot_response="answer",
+    )
+    await writer.enqueue(turn)
+    await asyncio.sleep(0.02)
+    await writer.stop()
+    assert flushed == [turn]
+
+
+@pytest.mark.anyio
+async def test_current_user_is_cached_and_invalidated_on_update(async_session):
+    token = create_access_token({"sub": "testuser"})
+    principal_cache.clear()
+
+    user = await get_current_user(token=token, db=async_session)
+    assert principal_cache.get("testuser") is user
+    assert await get_current_user(token=token, db=async_session) is user
+
+    user.is_active = False
+    await async_session.commit()
+    assert principal_cache.get("testuser") is None
+
+    user.is_active = True
+    await async_session.commit()
+
+
+@pytest.mark.anyio
+async def test_principal_cache_reports_hit_rate():
+    cache = PrincipalCache(ttl=60)
+    assert cache.get("alice") is None
+    cache.set("alice", object())
+    assert cache.get("alice") is not None
+    assert cache.hit_rate == 0.5
+
+
+@pytest.mark.anyio
+async def test_conversation_pages_follow_cursor(async_session):
+    user = await get_user_by_email(async_session, "testuser@example.com")
+    conversation_id = await save_conversation(async_session, user.id, "q0", "a0")
+    for index in range(1, 3):
+        await save_conversation(
+            async_session, user.id, f"q{index}", f"a{index}", conversation_id
+        )
+
+    contents, cursor = [], None
+    while True:
+        page = await list_messages_endpoint(
+            conversation_id,
+            cursor=cursor,
+            limit=4,
+            db=async_session,
+            current_user=user,
+        )
+        contents += [message.content for message in page.items]
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    assert contents == ["q0", "a0", "q1", "a1", "q2", "a2"]
+    assert page.items[-1].role == "assistant"
+
+    first = await list_conversations_endpoint(
+        limit=1, db=async_session, current_user=user
+    )
+    assert first.items[0].id == conversation_id
+    rest = await list_conversations_endpoint(
+        cursor=first.next_cursor, limit=100, db=async_session, current_user=user
+    )
+    assert conversation_id not in [item.id for item in rest.items]
+    assert rest.next_cursor is None
+
+    with pytest.raises(HTTPException) as error:
+        await list_messages_endpoint(
+            conversation_id,
+            cursor="not-a-cursor",
+            limit=4,
+            db=async_session,
+            current_user=user,
+        )
+    assert error.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_summarizer_folds_messages_outside_window(test_engine, async_session):
+    user = await get_user_by_email(async_session, "testuser@example.com")
+    conversation_id = await save_conversation(async_session, user.id, "q0", "a0")
+    for index in range(1, 4):
+        await save_conversation(
+            async_session, user.id, f"q{index}", f"a{index}", conversation_id
+        )
+
+    store = ConversationHistoryStore(window=4, max_messages=10)
+    summarizer = ConversationSummarizer(
+        window=4,
+        batch_size=3,
+        model="llama-3.1-70b-versatile",
+        store=store,
+        session_maker=sessionmaker(
+            test_engine, class_=AsyncSession, expire_on_commit=False
+        ),
+    )
+    summarizer.llm = MockLLM(max_tokens=5)
+
+    # Four messages left the window, not enough for a batch of five, so they
+    # stay in the history rather than falling out of the prompt
+    summarizer.batch_size = 5
+    assert await summarizer.summarize(conversation_id) is None
+    history = await store.load(async_session, conversation_id, user.id)
+    assert [message["content"] for message in history] == [
+        f"{sender}{index}" for index in range(4) for sender in "qa"
+    ]
+    summarizer.batch_size = 3
+
+    labels = {"agent_type": "summarizer", "model": summarizer.model, "call": "complete"}
+    calls = REGISTRY.get_sample_value("llm_call_seconds_count", labels) or 0.0
+    summary = await summarizer.summarize(conversation_id)
+    assert summary
+    # Summaries go through the same instrumented call path as chat requests
+    assert REGISTRY.get_sample_value("llm_call_seconds_count", labels) == calls + 1
+    # Nothing new has left the window since
+    assert await summarizer.summarize(conversation_id) is None
+
+    history = await store.load(async_session, conversation_id, user.id)
+    assert history[0] == {"role": "system", "content": SUMMARY_PREFIX + summary}
+    # q0, a0 and q1 were folded; a1 is still waiting for the next batch
+    assert [message["content"] for message in history[1:]] == [
+        "a1",
+        "q2",
+        "a2",
+        "q3",
+        "a3",
+    ]
+
+    # A cold load reads the stored summary
+    cold = await ConversationHistoryStore(window=4, max_messages=10).load(
+        async_session, conversation_id, user.id
+    )
+    assert cold == history
+
+
+@pytest.mark.anyio
+async def test_chat_stream_endpoint_streams_tokens_then_done():
+    workflow = chatbot_service.workflow_pool.acquire("simple", None)
+    workflow.llm = MockLLM(max_tokens=3)
+    token = create_access_token({"sub": "testuser"})
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/chatbot/chat/stream",
+            json={
+                "prompt": "Hello",
+                "agent_type": "simple",
+                "model": "llama-3.1-70b-versatile",
+                "metadata": {"no_cache": True},
+            },
+            headers={"Authorization": f"Bearer {token}"},
+        )
+    chatbot_service.workflow_pool.clear()
+
+    events = [line[7:] for line in response.text.splitlines() if line[:7] == "event: "]
+    assert response.status_code == 200
+    assert events[:4] == ["token", "token", "token", "done"]
+
+
+@pytest.mark.anyio
+async def test_chat_requests_over_the_rate_limit_get_429(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "user_rate", 0.01)
+    monkeypatch.setattr(rate_limiter, "user_burst", 1.0)
+    rate_limiter.local.clear()
+    workflow = chatbot_service.workflow_pool.acquire("simple", None)
+    workflow.llm = MockLLM(max_tokens=3)
+    token = create_access_token({"sub": "testuser"})
+    payload = {
+        "prompt": "Hello",
+        "agent_type": "simple",
+        "model": "llama-3.1-70b-versatile",
+        "metadata": {"no_cache": True},
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        headers = {"Authorization": f"Bearer {token}"}
+        first = await client.post("/api/v1/chatbot/chat", json=payload, headers=headers)
+        second = await client.post(
+            "/api/v1/chatbot/chat/stream", json=payload, headers=headers
+        )
+    chatbot_service.workflow_pool.clear()
+    rate_limiter.local.clear()
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert 90 <= int(second.headers["retry-after"]) <= 100
+
+
+@pytest.mark.anyio
+async def test_chat_batch_streams_results_and_saves_them_in_bulk(
+    monkeypatch, test_engine, async_session
+):
+    monkeypatch.setattr(
+        "backend.routers.chatbot.async_session_maker",
+        sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False),
+    )
+    workflow = chatbot_service.workflow_pool.acquire("simple", None)
+    workflow.llm = MockLLM(max_tokens=3)
+    token = create_access_token({"sub": "testuser"})
+    item = {"agent_type": "simple", "model": "llama-3.1-70b-versatile"}
+    batch = [{**item, "prompt": f"Question {index}"} for index in range(3)]
+    batch.append({**item, "prompt": "Lost", "conversation_id": str(uuid.uuid4())})
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/chatbot/chat/batch",
+            json={"requests": batch},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+    chatbot_service.workflow_pool.clear()
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results = {line["index"]: line for line in lines if line["type"] == "result"}
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert sorted(results) == [0, 1, 2, 3]
+    assert results[3]["error"] == "Conversation not found"
+    assert lines[-1] == {"type": "summary", "completed": 3, "failed": 1, "saved": True}
+
+    for index in range(3):
+        messages = await get_recent_messages(
+            async_session, uuid.UUID(results[index]["conversation_id"]), 10
+        )
+        assert [m["content"] for m in messages] == [
+            f"Question {index}",
+            results[index]["response"],
+        ]
+
+
+@pytest.mark.anyio
+async def test_jobs_run_in_background_and_can_be_long_polled(monkeypatch, tmp_path):
+    # Workers and long-polls use concurrent sessions, which the shared
+    # in-memory connection of `test_engine` cannot serve
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as db:
+        await create_user(
+            db,
+            UserCreate(username="jobuser", email="job@example.com", password="secret"),
+        )
+
+    async def _get_job_session():
+        async with session_maker() as db:
+            yield db
+
+    monkeypatch.setitem(app.dependency_overrides, get_session, _get_job_session)
+    runner = JobRunner(workers=1, poll_interval=0.05, session_maker=session_maker)
+    workflow = runner.service.workflow_pool.acquire("simple", None)
+    workflow.llm = MockLLM(max_tokens=3)
+    monkeypatch.setattr("backend.routers.jobs.job_runner", runner)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'jobuser'})}"}
+    request = {
+        "prompt": "Hi",
+        "agent_type": "simple",
+        "model": "llama-3.1-70b-versatile",
+        "metadata": {"no_cache": True},
+    }
+
+    await runner.start()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            submitted = await client.post("/api/v1/jobs", json=request, headers=headers)
+            job = submitted.json()
+            for _ in range(20):
+                if job["status"] not in ("queued", "running"):
+                    break
+                polled = await client.get(
+                    f"/api/v1/jobs/{job['id']}", params={"wait": 5}, headers=headers
+                )
+                job = polled.json()
+            missing = await client.get(f"/api/v1/jobs/{uuid.uuid4()}", headers=headers)
+    finally:
+        await runner.stop()
+
+    assert submitted.status_code == 202
+    assert submitted.json()["status"] == "queued"
+    assert job["status"] == "succeeded"
+    assert job["response"]
+    assert missing.status_code == 404
+    async with session_maker() as db:
+        messages = await get_recent_messages(db, uuid.UUID(job["conversation_id"]), 10)
+    assert [m["content"] for m in messages] == ["Hi", job["response"]]
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_requeued_job_only_accepts_the_current_attempt(async_session):
+    user = await get_user_by_email(async_session, "testuser@example.com")
+    job_id = (await create_job(async_session, user.id, {"prompt": "Hi"})).id
+    first = await claim_next_job(async_session)
+    assert (first.id, first.attempts) == (job_id, 1)
+    # The first worker stalls; its job is requeued and claimed again
+    await requeue_jobs(async_session, datetime.utcnow(), max_attempts=3)
+    second = await claim_next_job(async_session)
+    assert (second.id, second.attempts) == (job_id, 2)
+
+    assert not await finish_job(async_session, job_id, 1, "stale answer")
+    await async_session.rollback()
+    assert await finish_job(async_session, job_id, 2, "answer")
+    await async_session.commit()
+
+
+@pytest.mark.anyio
+async def test_long_poll_waiters_do_not_leak_events():
+    runner = JobRunner(workers=1)
+    job_id = uuid.uuid4()
+    await asyncio.gather(
+        runner.wait_for_update(job_id, 0.01), runner.wait_for_update(job_id, 0.02)
+    )
+    assert not runner._updates and not runner._watchers
@@ -0,0 +1,67 @@
+import pytest
+from llama_index.core.prompts import PromptTemplate
+
+from ..core.config import settings
+from ..services.chatbot_service.fake_llm import FakeLLM, FakeLLMError
+from ..services.chatbot_service.llm_registry import (
+    DEFAULT_MODEL,
+    LLMRegistry,
+    resolve_model,
+)
+from ..services.chatbot_service.multi_step_agent_workflow import SubtasksOut
+
+
+@pytest.mark.anyio
+async def test_registry_reuses_clients_and_http_pool():
+    registry = LLMRegistry(max_connections=4, max_keepalive_connections=2)
+    first = registry.get("gpt-4o")
+    assert registry.get("gpt-4o") is first
+    assert registry.get("gpt-4o", temperature=0.0) is not first
+    assert registry.get("gpt-4o-mini")._async_http_client is first._async_http_client
+
+    # Unknown models fall back to the default client
+    assert registry.get("not-a-model") is registry.get(DEFAULT_MODEL)
+
+    await registry.aclose()
+    assert len(registry) == 0
+    assert first._async_http_client.is_closed
+
+
+@pytest.fixture
+def fake_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "llm_fake_enabled", True)
+
+
+def test_fake_models_need_to_be_enabled():
+    assert resolve_model("fake/instant") == resolve_model(DEFAULT_MODEL)
+
+
+@pytest.mark.anyio
+async def test_fake_provider_is_deterministic(fake_enabled):
+    registry = LLMRegistry()
+    llm = registry.get("fake/instant?response_tokens=5")
+    assert isinstance(llm, FakeLLM)
+    assert llm.response_tokens == 5
+
+    first = str(await llm.acomplete("Hello"))
+    assert first == str(await llm.acomplete("Hello"))
+    assert len(first.split()) == 5
+
+    streamed = [chunk.delta async for chunk in await llm.astream_complete("Hello")]
+    assert "".join(streamed) == first
+
+    subtasks = await llm.astructured_predict(
+        SubtasksOut, PromptTemplate("Break down {task}"), task="a blog post"
+    )
+    assert len(subtasks.subtasks) == 3
+
+
+@pytest.mark.anyio
+async def test_fake_provider_injects_failures(fake_enabled):
+    llm = LLMRegistry().get("fake/instant?rate_limit_rate=1")
+    with pytest.raises(FakeLLMError) as error:
+        await llm.acomplete("Hello")
+    assert error.value.status_code == 429
+
+    with pytest.raises(ValueError):
+        LLMRegistry().get("fake/instant?latency_ms=1")
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from ..services.chatbot_service.fake_llm import FakeLLMError
+from ..services.chatbot_service.llm_scheduler import (
+    AdaptiveLimit,
+    LLMScheduler,
+    is_rate_limited,
+)
+
+
+@pytest.mark.anyio
+async def test_waiting_users_are_served_in_turn():
+    limit = AdaptiveLimit(initial=1)
+    await limit.acquire("alice")
+    served = []
+
+    async def call(user, name):
+        await limit.acquire(user)
+        served.append(name)
+        limit.release()
+
+    tasks = [
+        asyncio.create_task(call(user, name))
+        for user, name in [("alice", "a1"), ("alice", "a2"), ("alice", "a3")]
+        + [("bob", "b1"), ("bob", "b2")]
+    ]
+    await asyncio.sleep(0)
+    limit.release()
+    await asyncio.gather(*tasks)
+    assert served == ["a1", "b1", "a2", "b2", "a3"]
+    assert limit.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiters_give_up_their_place():
+    limit = AdaptiveLimit(initial=1)
+    await limit.acquire("alice")
+    waiter = asyncio.create_task(limit.acquire("bob"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    limit.release()
+    await asyncio.wait_for(limit.acquire("carol"), 1)
+    assert limit.in_flight == 1
+
+
+def test_limit_grows_additively_and_backs_off_on_overload():
+    now = [0.0]
+    limit = AdaptiveLimit(initial=2, timer=lambda: now[0])
+    limit.in_flight = 2
+    limit.release(latency=1.0)
+    assert limit.limit == pytest.approx(2.5)
+
+    limit.in_flight = 2
+    limit.release(overloaded=True)
+    assert limit.limit == pytest.approx(1.25)
+    # Further 429s within one round trip are part of the same overload
+    limit.in_flight = 1
+    limit.release(overloaded=True)
+    assert limit.limit == pytest.approx(1.25)
+
+    now[0] = 2.0
+    limit.in_flight = 1
+    limit.release(latency=10.0)
+    assert limit.limit == 1
+
+
+@pytest.mark.anyio
+async def test_scheduler_adapts_to_provider_rate_limits():
+    scheduler = LLMScheduler(initial=8)
+    with pytest.raises(FakeLLMError):
+        async with scheduler.slot("gpt-4o"):
+            raise FakeLLMError("Injected rate limit", status_code=429)
+    assert scheduler.limit_for("gpt-4o").limit == 4
+    assert scheduler.limit_for("gpt-4o-mini").limit == 8
+    assert is_rate_limited(FakeLLMError("x", status_code=429))
+    assert not is_rate_limited(FakeLLMError("x"))
@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, select, tuple_
+
+from ..models.conversation import Conversation
+from ..models.job import Job
+from ..models.message import Message
+from ..models.user import User
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+@pytest.fixture
+def migrated_db(tmp_path):
+    path = tmp_path / "migrations.db"
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("sqlalchemy.url", f"sqlite+aiosqlite:///{path}")
+    command.upgrade(config, "head")
+    engine = create_engine(f"sqlite:///{path}")
+    yield engine
+    engine.dispose()
+    command.downgrade(config, "base")
+
+
+def query_plan(engine, statement) -> str:
+    compiled = statement.compile(dialect=engine.dialect)
+    # Bound values do not influence the plan, so placeholders are enough
+    params = tuple("x" for _ in compiled.positiontup)
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+        return "\n".join(row[-1] for row in rows)
+
+
+def test_user_lookup_uses_username_index(migrated_db):
+    plan = query_plan(migrated_db, select(User).where(User.username == "alice"))
+    assert "USING INDEX ix_users_username" in plan
+
+
+def test_conversation_listing_uses_user_index(migrated_db):
+    statement = (
+        select(Conversation.id, Conversation.created_at)
+        .where(
+            Conversation.user_id == "x",
+            tuple_(Conversation.created_at, Conversation.id) < ("x", "x"),
+        )
+        .order_by(Conversation.created_at.desc(), Conversation.id.desc())
+        .limit(20)
+    )
+    plan = query_plan(migrated_db, statement)
+    assert "USING COVERING INDEX ix_conversations_user_id_created_at_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_history_window_uses_conversation_timestamp_index(migrated_db):
+    statement = (
+        select(Message.sender, Message.content)
+        .where(Message.conversation_id == "x")
+        .order_by(Message.timestamp.desc())
+        .limit(20)
+    )
+    plan = query_plan(migrated_db, statement)
+    assert "USING INDEX ix_messages_conversation_id_timestamp_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_message_pages_use_keyset_index(migrated_db):
+    statement = (
+        select(Message.id, Message.sender, Message.content, Message.timestamp)
+        .where(
+            Message.conversation_id == "x",
+            tuple_(Message.timestamp, Message.id) > ("x", "x"),
+        )
+        .order_by(Message.timestamp, Message.id)
+        .limit(50)
+    )
+    plan = query_plan(migrated_db, statement)
+    assert "USING INDEX ix_messages_conversation_id_timestamp_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_job_claim_uses_status_index(migrated_db):
+    statement = (
+        select(Job.id).where(Job.status == "x").order_by(Job.created_at).limit(5)
+    )
+    plan = query_plan(migrated_db, statement)
+    assert "USING INDEX ix_jobs_status_created_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_username_is_unique(migrated_db):
+    with migrated_db.connect() as conn:
+        indexes = conn.exec_driver_sql("PRAGMA index_list('users')").fetchall()
+    unique = {row[1]: row[2] for row in indexes}
+    assert unique["ix_users_username"] == 1
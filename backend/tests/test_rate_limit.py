@@ -0,0 +1,35 @@
+import pytest
+
+from ..core.rate_limit import LocalBuckets, RateLimiter
+
+
+def test_buckets_refill_and_only_take_when_all_have_room():
+    now = [0.0]
+    buckets = LocalBuckets(timer=lambda: now[0])
+    user = [("user", 1.0, 2.0)]
+    shared = [("user", 1.0, 2.0), ("global", 1.0, 1.0)]
+
+    assert buckets.acquire(shared, 1) == (0, 0.0)
+    # The global bucket is empty, so the user's tokens are left untouched
+    assert buckets.acquire(shared, 1) == (2, 1.0)
+    assert buckets.acquire(user, 1) == (0, 0.0)
+    assert buckets.acquire(user, 1) == (1, 1.0)
+
+    now[0] = 1.5
+    assert buckets.acquire(user, 1) == (0, 0.0)
+    # Costs above the burst size are capped so they can still be admitted
+    now[0] = 10.0
+    assert buckets.acquire(user, 5) == (0, 0.0)
+
+
+@pytest.mark.anyio
+async def test_requests_are_weighted_by_agent_type():
+    limiter = RateLimiter(
+        user_rate=0.5,
+        user_burst=6,
+        costs={"simple": 1, "multi_step": 6},
+    )
+    assert await limiter.acquire("alice", "multi_step") == (True, 0.0)
+    allowed, retry_after = await limiter.acquire("alice", "simple")
+    assert not allowed and retry_after == pytest.approx(2.0, abs=0.1)
+    assert (await limiter.acquire("bob", "simple"))[0]
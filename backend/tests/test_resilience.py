@@ -0,0 +1,133 @@
+import asyncio
+
+import httpx
+import pytest
+
+from ..services.chatbot_service.fake_llm import FakeLLMError
+from ..services.chatbot_service.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    ResilientCaller,
+    classify,
+    request_deadline,
+)
+
+
+def test_errors_are_classified():
+    assert classify(FakeLLMError("x", status_code=429)) == "rate_limited"
+    assert classify(FakeLLMError("x", status_code=503)) == "server"
+    assert classify(FakeLLMError("x", status_code=400)) == "client"
+    assert classify(asyncio.TimeoutError()) == "timeout"
+    assert classify(httpx.ConnectError("refused")) == "connection"
+    assert classify(ValueError("bad output")) == "other"
+
+
+def test_circuit_opens_then_probes_half_open():
+    now = [0.0]
+    breaker = CircuitBreaker(
+        "groq", failure_threshold=2, reset_timeout=10, timer=lambda: now[0]
+    )
+    breaker.on_failure()
+    breaker.before_call()
+    breaker.on_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] = 10
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.on_failure()
+    assert breaker.state == "open"
+
+    now[0] = 20
+    breaker.before_call()
+    breaker.on_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def flaky(*errors):
+    errors = list(errors)
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    return attempt, calls
+
+
+@pytest.mark.anyio
+async def test_transient_failures_are_retried():
+    caller = ResilientCaller(max_attempts=3, backoff_base=0.001)
+    attempt, calls = flaky(FakeLLMError("x"), asyncio.TimeoutError())
+    assert await caller.call("gpt-4o", attempt) == "ok"
+    assert len(calls) == 3
+
+    attempt, calls = flaky(FakeLLMError("x", status_code=400))
+    with pytest.raises(FakeLLMError):
+        await caller.call("gpt-4o", attempt)
+    assert len(calls) == 1
+
+
+@pytest.mark.anyio
+async def test_retries_stop_at_the_request_deadline():
+    caller = ResilientCaller(max_attempts=5, backoff_base=1.0, backoff_max=1.0)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with request_deadline(0.05):
+        with pytest.raises(DeadlineExceeded):
+            await caller.call("gpt-4o", slow)
+        with pytest.raises(DeadlineExceeded):
+            await caller.call("gpt-4o", slow)
+
+
+@pytest.mark.anyio
+async def test_deadline_hits_do_not_open_the_circuit():
+    caller = ResilientCaller(max_attempts=1, failure_threshold=1)
+    slot = asyncio.Lock()
+
+    async def queued():
+        # Waits for a concurrency slot that never frees up
+        async with slot:
+            return "ok"
+
+    async with slot:
+        with request_deadline(0.02):
+            with pytest.raises(DeadlineExceeded):
+                await caller.call("gpt-4o", queued)
+    assert caller.breaker_for("gpt-4o").state == "closed"
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with request_deadline(0.02):
+        with pytest.raises(DeadlineExceeded):
+            await caller.call("gpt-4o", slow)
+    assert caller.breaker_for("gpt-4o").state == "closed"
+
+    # The provider's own timeouts still count
+    with pytest.raises(asyncio.TimeoutError):
+        await caller.call("gpt-4o", flaky(asyncio.TimeoutError())[0])
+    assert caller.breaker_for("gpt-4o").state == "open"
+
+
+@pytest.mark.anyio
+async def test_open_circuit_fails_fast():
+    caller = ResilientCaller(max_attempts=1, failure_threshold=2)
+    for _ in range(2):
+        with pytest.raises(FakeLLMError):
+            await caller.call("gpt-4o-mini", flaky(FakeLLMError("x"))[0])
+    attempt, calls = flaky()
+    with pytest.raises(CircuitOpenError):
+        await caller.call("gpt-4o-mini", attempt)
+    assert not calls
+    assert await caller.call("gpt-4o", attempt) == "ok"
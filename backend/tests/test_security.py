@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+import pytest
+
+from ..core.security import aget_password_hash, averify_password, verify_password
+
+
+@pytest.mark.anyio
+async def test_password_hashing_does_not_block_event_loop():
+    hashed = await aget_password_hash("secret")
+    assert verify_password("secret", hashed)
+
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal max_lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.005)
+
+    ticks = asyncio.create_task(ticker())
+    results = await asyncio.gather(
+        averify_password("secret", hashed),
+        averify_password("wrong", hashed),
+        averify_password("secret", hashed),
+    )
+    done.set()
+    await ticks
+
+    assert results == [True, False, True]
+    # A single blocking bcrypt verification alone takes well over 100ms
+    assert max_lag < 0.1
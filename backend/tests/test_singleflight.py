@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from ..core.singleflight import SingleFlight
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+    assert results == ["answer"] * 5
+    assert calls == 1
+    assert len(flight) == 0
+
+
+@pytest.mark.anyio
+async def test_leader_cancellation_does_not_cancel_followers():
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "answer"
+
+    leader = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "answer"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.anyio
+async def test_work_is_cancelled_when_every_caller_leaves():
+    flight = SingleFlight("test")
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def work():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    caller = asyncio.create_task(flight.do("key", work))
+    await started.wait()
+    caller.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert len(flight) == 0
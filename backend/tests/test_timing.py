@@ -0,0 +1,39 @@
+import httpx
+import pytest
+
+from ..core.timing import RequestTimings, _timings, current_timings, record, timed
+from ..main import app
+
+
+def test_timed_is_a_no_op_without_a_collector():
+    assert current_timings() is None
+    with timed("work"):
+        pass
+    record("work", 1.0)
+    assert current_timings() is None
+
+
+def test_repeated_names_are_aggregated():
+    timings = RequestTimings()
+    token = _timings.set(timings)
+    try:
+        record("llm.complete", 0.25)
+        record("llm.complete", 0.5)
+        with timed("history"):
+            pass
+    finally:
+        _timings.reset(token)
+
+    assert timings.as_dict()["llm.complete"] == 750.0
+    header = timings.header()
+    assert 'llm.complete;dur=750.00;desc="2 calls"' in header
+    assert "history;dur=" in header
+
+
+@pytest.mark.anyio
+async def test_responses_carry_server_timing_header():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/health")
+    assert response.status_code == 200
+    assert response.headers["server-timing"].startswith("total;dur=")
@@ -0,0 +1,45 @@
+import pytest
+
+from ..services.chatbot_service.multi_step_agent_workflow import MultiStepAgentWorkflow
+from ..services.chatbot_service.simple_chatbot_workflow import SimpleChatbotWorkflow
+from ..services.chatbot_service.workflow_pool import WorkflowPool
+
+
+def test_pool_reuses_instances_per_agent_and_model():
+    pool = WorkflowPool(max_size=4)
+    first = pool.acquire("simple", "gpt-4o-mini")
+    second = pool.acquire("simple", "gpt-4o-mini")
+    assert first is second
+    assert isinstance(first, SimpleChatbotWorkflow)
+    assert first.model == "gpt-4o-mini"
+
+    other = pool.acquire("multi_step", "gpt-4o-mini")
+    assert isinstance(other, MultiStepAgentWorkflow)
+    assert other is not first
+
+
+def test_pool_evicts_least_recently_used():
+    pool = WorkflowPool(max_size=2)
+    pool.acquire("simple", "gpt-4o")
+    pool.acquire("simple", "gpt-4o-mini")
+    pool.acquire("simple", "gpt-4o")  # refresh recency
+    pool.acquire("prompt_optim", "gpt-4o")
+
+    assert len(pool) == 2
+    assert ("simple", "gpt-4o") in pool
+    assert ("simple", "gpt-4o-mini") not in pool
+
+
+def test_pool_rejects_unknown_workflow_type():
+    pool = WorkflowPool()
+    with pytest.raises(ValueError):
+        pool.acquire("unknown", "gpt-4o")
+
+
+def test_memory_is_not_shared_between_requests():
+    workflow = WorkflowPool().acquire("simple", "gpt-4o")
+    memory_a = workflow.build_memory([{"role": "user", "content": "hello"}])
+    memory_b = workflow.build_memory()
+    assert memory_a is not memory_b
+    assert len(memory_a.get()) == 1
+    assert memory_b.get() == []
@@ -0,0 +1,61 @@
+"""
+Standalone job worker.
+
+Runs the background job workers outside the API processes, so multi_step
+jobs do not compete with interactive chats for the web workers' event loop
+and CPU. Start the API with `JOB_WORKERS=0` and run as many of these as
+the job load needs; they claim jobs from the shared `jobs` table.
+
+Usage:
+    poetry run python -m backend.worker --workers 4
+"""
+
+import argparse
+import asyncio
+import signal
+
+from . import logger
+from .core.config import settings
+from .services.chatbot_service.llm_registry import llm_registry
+from .services.chatbot_service.response_cache import response_cache
+from .services.conversation_summarizer import conversation_summarizer
+from .services.job_runner import job_runner
+
+
+async def main(workers: int) -> None:
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+
+    job_runner.workers = workers
+    try:
+        await llm_registry.warm_up(settings.llm_warmup_models)
+        await job_runner.start()
+        logger.info(f"Job worker started with {workers} workers")
+        await stopping.wait()
+    finally:
+        # Jobs still running are requeued for the next worker
+        await job_runner.stop()
+        await conversation_summarizer.stop()
+        await response_cache.aclose()
+        await llm_registry.aclose()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        # JOB_WORKERS is usually 0 for the API processes sharing the settings
+        default=settings.job_workers or 4,
+        help="jobs run concurrently by this process",
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args().workers))
@@ -0,0 +1,367 @@
+"""
+Offline load test for the chat endpoints.
+
+Serves the FastAPI app in-process with uvicorn on loopback (SQLite by
+default, or any DATABASE_URL such as a local Postgres) using the built-in
+`fake/<profile>` LLM provider, replays a JSONL corpus of ChatRequests at a
+fixed concurrency or request rate, and reports throughput and p50/p95/p99
+latency per endpoint. Results are also written as JSON so runs can be
+compared across commits.
+
+Usage:
+    poetry run python -m benchmarks.load_test --concurrency 32 --requests 500
+    poetry run python -m benchmarks.load_test --rps 50 --duration 30 --endpoint both
+    poetry run python -m benchmarks.load_test --model "fake/slow?failure_rate=0.05"
+    poetry run python -m benchmarks.load_test --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "corpus" / "chat_requests.jsonl"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+ENDPOINTS = {
+    "chat": "/api/v1/chatbot/chat",
+    "chat_stream": "/api/v1/chatbot/chat/stream",
+}
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    agent_type: str
+    latency: float
+    ok: bool
+    first_token: Optional[float] = None
+    # The workflow failed and answered with the fallback message
+    fallback: bool = False
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {}
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    """
+    Aggregate samples per endpoint, with a per-agent-type breakdown.
+    """
+    report = {}
+    for endpoint in sorted({sample.endpoint for sample in samples}):
+        selected = [sample for sample in samples if sample.endpoint == endpoint]
+        ok = [sample for sample in selected if sample.ok]
+        summary = {
+            "requests": len(selected),
+            "errors": len(selected) - len(ok),
+            "fallbacks": sum(sample.fallback for sample in ok),
+            "throughput_rps": len(ok) / elapsed,
+            **latency_summary([sample.latency for sample in ok]),
+        }
+        first_tokens = [s.first_token for s in ok if s.first_token is not None]
+        if first_tokens:
+            summary["first_token"] = latency_summary(first_tokens)
+        summary["agent_types"] = {}
+        for agent_type in sorted({sample.agent_type for sample in ok}):
+            latencies = [s.latency for s in ok if s.agent_type == agent_type]
+            summary["agent_types"][agent_type] = {
+                "requests": len(latencies),
+                **latency_summary(latencies),
+            }
+        report[endpoint] = summary
+    return report
+
+
+def load_corpus(path: Path) -> List[Dict[str, Any]]:
+    from backend.schemas.chatbot import ChatRequest
+
+    with open(path) as f:
+        # Validate up front so a bad line fails the run before any load is sent
+        return [
+            ChatRequest(**json.loads(line)).model_dump(mode="json")
+            for line in f
+            if line.strip()
+        ]
+
+
+def migrate(database_url: str) -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.upgrade(config, "head")
+
+
+async def create_users(client, count: int) -> List[str]:
+    """
+    Register `count` users and return a bearer token for each.
+    """
+    tokens = []
+    suffix = int(time.time())
+    for index in range(count):
+        username = f"loadtest-{suffix}-{index}"
+        response = await client.post(
+            "/register",
+            json={
+                "email": f"{username}@example.com",
+                "username": username,
+                "password": "loadtest-password",
+            },
+        )
+        response.raise_for_status()
+        response = await client.post(
+            "/token", data={"username": username, "password": "loadtest-password"}
+        )
+        response.raise_for_status()
+        tokens.append(response.json()["access_token"])
+    return tokens
+
+
+async def send(
+    client, endpoint: str, token: str, payload: Dict[str, Any], timeout: float
+) -> Sample:
+    from backend.services.chatbot_service.base_workflow import FALLBACK_RESPONSE
+
+    headers = {"Authorization": f"Bearer {token}"}
+    agent_type = payload["agent_type"]
+    start = time.perf_counter()
+    try:
+        if endpoint == "chat":
+            response = await client.post(
+                ENDPOINTS[endpoint], json=payload, headers=headers, timeout=timeout
+            )
+            ok = response.status_code == 200
+            fallback = ok and response.json()["response"] == FALLBACK_RESPONSE
+            return Sample(
+                endpoint, agent_type, time.perf_counter() - start, ok, None, fallback
+            )
+
+        first_token, ok, fallback, event = None, False, False, None
+        async with client.stream(
+            "POST", ENDPOINTS[endpoint], json=payload, headers=headers, timeout=timeout
+        ) as response:
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: ") :]
+                    if first_token is None and event == "token":
+                        first_token = time.perf_counter() - start
+                    ok = ok or (event == "done" and response.status_code == 200)
+                    ok = ok and event != "error"
+                elif line.startswith("data: ") and event == "done":
+                    data = json.loads(line[len("data: ") :])
+                    fallback = data["response"] == FALLBACK_RESPONSE
+        return Sample(
+            endpoint,
+            agent_type,
+            time.perf_counter() - start,
+            ok,
+            first_token,
+            fallback,
+        )
+    except Exception:
+        return Sample(endpoint, agent_type, time.perf_counter() - start, False)
+
+
+async def run_load(client, corpus, tokens, args) -> List[Sample]:
+    """
+    Replay the corpus either closed-loop (`--concurrency` workers sending
+    back-to-back) or open-loop (`--rps` arrivals regardless of completions),
+    until `--requests` have been sent or `--duration` seconds have passed.
+    """
+    endpoints = ["chat", "chat_stream"] if args.endpoint == "both" else [args.endpoint]
+    jobs = zip(
+        itertools.cycle(corpus), itertools.cycle(endpoints), itertools.cycle(tokens)
+    )
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    sent = 0
+
+    def next_job():
+        nonlocal sent
+        if args.requests and sent >= args.requests:
+            return None
+        if deadline is not None and time.perf_counter() >= deadline:
+            return None
+        sent += 1
+        payload, endpoint, token = next(jobs)
+        payload = {**payload, "model": args.model}
+        if not args.use_cache:
+            payload = {**payload, "metadata": {**payload["metadata"], "no_cache": True}}
+        return endpoint, token, payload
+
+    samples: List[Sample] = []
+
+    if args.rps:
+        tasks = []
+        interval = 1 / args.rps
+        next_at = time.perf_counter()
+        while (job := next_job()) is not None:
+            endpoint, token, payload = job
+            tasks.append(
+                asyncio.create_task(
+                    send(client, endpoint, token, payload, args.timeout)
+                )
+            )
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        return list(await asyncio.gather(*tasks))
+
+    async def worker():
+        while (job := next_job()) is not None:
+            endpoint, token, payload = job
+            samples.append(await send(client, endpoint, token, payload, args.timeout))
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return samples
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+    import uvicorn
+
+    from backend import logger
+    from backend.main import app
+
+    # Per-request application logs would dominate the run time and the output
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    corpus = load_corpus(args.corpus)
+
+    # A real server on loopback, since the in-memory ASGI transport buffers
+    # whole responses and would hide time to first token
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning")
+    )
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.05)
+
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}",
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=None),
+        ) as client:
+            tokens = await create_users(client, args.users)
+            started_at = datetime.now(timezone.utc)
+            start = time.perf_counter()
+            samples = await run_load(client, corpus, tokens, args)
+            elapsed = time.perf_counter() - start
+    finally:
+        server.should_exit = True
+        await serving
+
+    return {
+        "git_commit": git_commit(),
+        "started_at": started_at.isoformat(),
+        "elapsed_s": elapsed,
+        "config": {
+            key: str(value) if isinstance(value, Path) else value
+            for key, value in vars(args).items()
+            if key != "output"
+        },
+        "results": summarize(samples, elapsed),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=16)
+    load.add_argument("--rps", type=float, help="Open-loop arrival rate")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--duration", type=float, help="Stop after N seconds")
+    parser.add_argument(
+        "--endpoint", choices=["chat", "chat_stream", "both"], default="chat"
+    )
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Allow response cache hits (by default every request runs the workflow)",
+    )
+    parser.add_argument(
+        "--database-url",
+        help="Database to run against (default: a temporary SQLite file)",
+    )
+    parser.add_argument(
+        "--model",
+        default="fake/default",
+        help="Model for every request, e.g. 'fake/slow?failure_rate=0.1'",
+    )
+    parser.add_argument("--output", type=Path, help="Result file (JSON)")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    if args.duration:
+        args.requests = (
+            0 if args.requests == parser.get_default("requests") else args.requests
+        )
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    tmpdir = tempfile.TemporaryDirectory()
+    database_url = (
+        args.database_url or f"sqlite+aiosqlite:///{Path(tmpdir.name) / 'load.db'}"
+    )
+
+    # Settings are read at import time, so configure the app before importing it
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("USE_REDIS", "false")
+    os.environ["LLM_WARMUP_MODELS"] = "[]"
+    os.environ["LLM_FAKE_ENABLED"] = "true"
+    # A handful of users would otherwise be throttled by the per-user limit
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    migrate(database_url)
+
+    report = asyncio.run(main(args))
+    report["config"]["database_url"] = database_url.split("@")[-1]
+
+    output = args.output or RESULTS_DIR / (
+        f"{report['started_at'][:19].replace(':', '')}-{report['git_commit']}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report["results"], indent=2))
+    print(f"Results written to {output}")
+    tmpdir.cleanup()
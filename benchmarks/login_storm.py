@@ -0,0 +1,90 @@
+"""
+Login-storm benchmark.
+
+Simulates chat traffic (coroutines awaiting a fixed "LLM" latency) on the
+event loop while a burst of logins verifies bcrypt passwords, once with the
+blocking `verify_password` and once with the pooled `averify_password`.
+Chat latency should stay at the simulated LLM latency when hashing is
+offloaded.
+
+Usage:
+    poetry run python -m benchmarks.login_storm --logins 16
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from backend.core.security import averify_password, get_password_hash, verify_password
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def simulated_chat(llm_latency: float) -> float:
+    start = time.perf_counter()
+    await asyncio.sleep(llm_latency)
+    return time.perf_counter() - start
+
+
+async def run_storm(
+    verify: Callable[[str, str], Awaitable[bool]],
+    hashed: str,
+    logins: int,
+    llm_latency: float,
+) -> Dict[str, float]:
+    storm_over = asyncio.Event()
+
+    async def chat_traffic() -> List[float]:
+        latencies = []
+        while not storm_over.is_set():
+            latencies.append(await simulated_chat(llm_latency))
+        return latencies
+
+    chats = asyncio.create_task(chat_traffic())
+    await asyncio.sleep(llm_latency)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(verify("password", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    storm_over.set()
+    latencies = await chats
+
+    return {
+        "logins_per_s": logins / elapsed,
+        "chats": len(latencies),
+        "chat_p50_ms": statistics.median(latencies) * 1000,
+        "chat_p99_ms": percentile(latencies, 99) * 1000,
+        "chat_max_ms": max(latencies) * 1000,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    hashed = get_password_hash("password")
+
+    async def blocking_verify(plain: str, hashed_password: str) -> bool:
+        return verify_password(plain, hashed_password)
+
+    results = {
+        "llm_latency_ms": args.llm_latency * 1000,
+        "blocking": await run_storm(
+            blocking_verify, hashed, args.logins, args.llm_latency
+        ),
+        "offloaded": await run_storm(
+            averify_password, hashed, args.logins, args.llm_latency
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=16)
+    parser.add_argument("--llm-latency", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
@@ -10,6 +10,9 @@
 # Global variable to store the access token
 access_token = None
 
+# Server-side conversation continued by the current chat
+conversation_id = None
+
 
 def login(username: str, password: str) -> str:
     global access_token
@@ -25,20 +28,32 @@ def login(username: str, password: str) -> str:
 
 
 def _prepare_api_data(message: str, history: list, agent_type: str) -> dict:
-    formatted_history = [
-        {"role": "user" if i % 2 == 0 else "assistant", "content": msg}
-        for i, msg in enumerate(history)
-    ]
-    return {
+    global conversation_id
+    # An empty history means the user started a new chat
+    if not history:
+        conversation_id = None
+
+    data = {
         "prompt": message,
-        "history": formatted_history,
         "agent_type": agent_type,
         "metadata": {},
     }
+    if conversation_id:
+        # The server already has the history of this conversation
+        data["conversation_id"] = conversation_id
+    else:
+        data["history"] = [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": msg}
+            for i, msg in enumerate(history)
+        ]
+    return data
 
 
 async def _handle_api_response(response: requests.Response) -> str:
-    return response.json()["response"]
+    global conversation_id
+    body = response.json()
+    conversation_id = body.get("conversation_id") or conversation_id
+    return body["response"]
 
 
 async def inference(